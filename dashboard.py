@@ -1,15 +1,17 @@
 # dashboard_enhanced.py - Full Excel-like editing with two-way sync
 import os
+import functools
 import threading
+import time
 import traceback
+import webbrowser
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import pandas as pd
 import sqlite3
 from PIL import Image, ImageTk
 
 
-from main import BASE_DIR, process, fetch_all_rows, EXCEL_PATH, DB_PATH, to_et_naive, init_db
+from main import BASE_DIR, process, EXCEL_PATH, DB_PATH, to_et_naive, init_db, connect_db
 
 # Style config
 PRIMARY_COLOR = "#1E3A8A"
@@ -22,6 +24,39 @@ CARD_BG = "#FFFFFF"
 HEADER_BG = "#1E3A8A"
 HEADER_TEXT = "#FFFFFF"
 
+# Cell edits / row deletes are buffered and written in one transaction
+FLUSH_DELAY_MS = 200
+FLUSH_MAX_ROWS = 500
+FLUSH_RETRY_MS = 3000  # database locked (e.g. a sync is writing): keep the edits, try again
+CLOSE_FLUSH_ATTEMPTS = 3  # on close the flush is retried in place (each waits the busy timeout)
+
+# Treeview items are created in slices; "Load more" renders the next one
+RENDER_BATCH = 500
+
+# Long text columns are shortened in the tree; the full text shows in a hover tooltip
+TRUNCATE_COLUMNS = ("Summary", "Subject")
+DISPLAY_MAX_CHARS = 80
+
+# Wait this long after the last keystroke before re-running the filter query
+FILTER_DEBOUNCE_MS = 200
+
+# Map display names to DB columns (custom columns use their own name)
+DISPLAY_TO_DB = {
+    "Date (ET)": "first_seen_utc",
+    "Initiated By": "initiator_email",
+    "P/N": "part_number",
+    "Category": "category",
+    "Summary": "summary",
+    "Subject": "subject",
+    "Link": "thread_url"
+}
+
+
+@functools.lru_cache(maxsize=8192)
+def _to_et_cached(dt_utc_str):
+    """to_et_naive memoized per UTC string; many rows share a timestamp"""
+    return to_et_naive(dt_utc_str)
+
 
 class HoverButton(tk.Button):
     def __init__(self, master=None, **kw):
@@ -39,6 +74,8 @@ class HoverButton(tk.Button):
 
 
 class EditableComplaintDashboard(tk.Tk):
+    _logo_photo = None  # resized header logo, decoded once per process
+
     def __init__(self):
         super().__init__()
         
@@ -46,7 +83,30 @@ class EditableComplaintDashboard(tk.Tk):
         self.geometry("1400x800")
         self.configure(bg=BACKGROUND_COLOR)
         
-        # Track custom columns
+        # One long-lived connection for all UI-side queries (autocommit, WAL).
+        # The sync worker goes through main.process(), which opens its own.
+        self.con = connect_db(isolation_level=None, check_same_thread=False,
+                              cached_statements=256)
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        
+        # Buffered writes: db column -> [(value, conversation_id)], plus deleted ids
+        self._pending_updates = {}
+        self._pending_deletes = []
+        self._pending_count = 0
+        self._flush_after_id = None
+        self._flush_retrying = False
+        self._filter_after_id = None
+        
+        # Full filtered result as (conversation_id, display values) and how many are in the tree
+        self._filtered_rows = []
+        self._current_iids = {}  # conversation_id (tree iid) -> displayed values
+        self._refresh_gen = 0  # bumped per refresh so stale worker results are dropped
+        self._rendered = 0
+        self._total_rows = 0
+        
+        # Track custom columns (and the complaints schema, see _save_custom_column)
+        init_db()
+        self._table_cols = set()
         self.custom_columns = self._load_custom_columns()
         self.sort_column = None
         self.sort_reverse = False
@@ -58,41 +118,73 @@ class EditableComplaintDashboard(tk.Tk):
         self._build_table()
         self._build_status_bar()
         
+        self._refresh_category_options()
         self.refresh_table()
 
+    def _exec(self, sql, params=()):
+        """Run a statement on the shared connection (sqlite3 caches the compiled SQL)"""
+        return self.con.execute(sql, params)
+
+    def _on_close(self):
+        # Buffered edits must be written (or knowingly discarded) before the window goes
+        while True:
+            for _ in range(CLOSE_FLUSH_ATTEMPTS):
+                self._flush_edits()
+                if not self._pending_count:
+                    break
+                time.sleep(1)
+            if not self._pending_count:
+                break
+            choice = messagebox.askyesnocancel(
+                "Unsaved Changes",
+                f"{self._pending_count} change(s) could not be saved because the database "
+                "is busy (a sync may be running).\n\n"
+                "Yes: try again\nNo: discard them and close\nCancel: keep the dashboard open",
+            )
+            if choice is None:
+                return  # the scheduled retry keeps trying in the background
+            if not choice:
+                break
+        if self._flush_after_id is not None:
+            self.after_cancel(self._flush_after_id)
+            self._flush_after_id = None
+        try:
+            self.con.close()
+        finally:
+            self.destroy()
+
     def _load_custom_columns(self):
         """Load custom column definitions from database"""
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            cur.execute("""
+            self._exec("""
                 CREATE TABLE IF NOT EXISTS custom_columns (
                     column_name TEXT PRIMARY KEY,
                     column_type TEXT DEFAULT 'TEXT'
                 )
             """)
-            cur.execute("SELECT column_name FROM custom_columns")
-            cols = [row[0] for row in cur.fetchall()]
-            con.close()
-            return cols
+            # Indexes backing the filter/sort queries built in _build_query
+            self._exec("CREATE INDEX IF NOT EXISTS ix_cx_category ON complaints(category)")
+            self._exec("CREATE INDEX IF NOT EXISTS ix_cx_first_seen ON complaints(first_seen_utc DESC)")
+            self._table_cols = {row[1] for row in self._exec("PRAGMA table_info(complaints)")}
+            return [row[0] for row in self._exec("SELECT column_name FROM custom_columns")]
         except Exception:
             return []
 
     def _save_custom_column(self, col_name):
         """Save new custom column to database"""
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            cur.execute("INSERT OR IGNORE INTO custom_columns (column_name) VALUES (?)", (col_name,))
+            self._exec("INSERT OR IGNORE INTO custom_columns (column_name) VALUES (?)", (col_name,))
             
             # Add column to complaints table if it doesn't exist
-            cur.execute(f"PRAGMA table_info(complaints)")
-            existing = [row[1] for row in cur.fetchall()]
-            if col_name not in existing:
-                cur.execute(f"ALTER TABLE complaints ADD COLUMN [{col_name}] TEXT")
+            if col_name not in self._table_cols:
+                try:
+                    self._exec(f"ALTER TABLE complaints ADD COLUMN [{col_name}] TEXT")
+                except sqlite3.OperationalError as e:
+                    # Added since we loaded the schema (e.g. from the web app)
+                    if "duplicate column" not in str(e):
+                        raise
+                self._table_cols.add(col_name)
             
-            con.commit()
-            con.close()
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add column: {e}")
@@ -101,11 +193,7 @@ class EditableComplaintDashboard(tk.Tk):
     def _delete_custom_column(self, col_name):
         """Remove custom column from tracking (SQLite doesn't support DROP COLUMN easily)"""
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            cur.execute("DELETE FROM custom_columns WHERE column_name=?", (col_name,))
-            con.commit()
-            con.close()
+            self._exec("DELETE FROM custom_columns WHERE column_name=?", (col_name,))
             if col_name in self.custom_columns:
                 self.custom_columns.remove(col_name)
             return True
@@ -113,6 +201,22 @@ class EditableComplaintDashboard(tk.Tk):
             messagebox.showerror("Error", f"Failed to delete column: {e}")
             return False
 
+    @classmethod
+    def _get_logo_photo(cls):
+        """Decode and resize mac_logo.png on first use, then reuse the PhotoImage"""
+        if cls._logo_photo is None:
+            logo_path = os.path.join(BASE_DIR, "mac_logo.png")  # Place mac_logo.png in same folder as dashboard.py
+            logo_img = Image.open(logo_path)
+            
+            # Resize logo to fit header nicely (50px height works well for MAC logo)
+            max_height = 50
+            ratio = max_height / logo_img.height
+            new_width = int(logo_img.width * ratio)
+            logo_img = logo_img.resize((new_width, max_height), Image.Resampling.BILINEAR)  # ~2x downscale; LANCZOS adds cost, not visible quality
+            
+            cls._logo_photo = ImageTk.PhotoImage(logo_img)
+        return cls._logo_photo
+
     def _build_header(self):
         header = tk.Frame(self, bg=HEADER_BG, height=80)
         header.pack(fill="x")
@@ -127,18 +231,8 @@ class EditableComplaintDashboard(tk.Tk):
         logo_frame.pack(side="left", padx=(20, 10))
         
         # Try to load logo image
-        logo_path = os.path.join(BASE_DIR, "mac_logo.png")  # Place mac_logo.png in same folder as dashboard.py
         try:
-            from PIL import Image, ImageTk
-            logo_img = Image.open(logo_path)
-            
-            # Resize logo to fit header nicely (50px height works well for MAC logo)
-            max_height = 50
-            ratio = max_height / logo_img.height
-            new_width = int(logo_img.width * ratio)
-            logo_img = logo_img.resize((new_width, max_height), Image.Resampling.LANCZOS)
-            
-            self.logo_photo = ImageTk.PhotoImage(logo_img)  # Keep reference to prevent garbage collection
+            self.logo_photo = self._get_logo_photo()  # Keep reference to prevent garbage collection
             logo_label = tk.Label(logo_frame, image=self.logo_photo, bg=HEADER_BG)
             logo_label.pack()
         except Exception as e:
@@ -238,21 +332,21 @@ class EditableComplaintDashboard(tk.Tk):
         self.pn_filter = tk.StringVar()
         pn_entry = tk.Entry(frame, textvariable=self.pn_filter, width=18)
         pn_entry.pack(side="left", padx=(5, 20))
-        pn_entry.bind("<KeyRelease>", lambda e: self.apply_filters())
+        pn_entry.bind("<KeyRelease>", self._schedule_filter)
         
         # Initiator filter
         tk.Label(frame, text="Initiator:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(side="left")
         self.initiator_filter = tk.StringVar()
         init_entry = tk.Entry(frame, textvariable=self.initiator_filter, width=20)
         init_entry.pack(side="left", padx=(5, 20))
-        init_entry.bind("<KeyRelease>", lambda e: self.apply_filters())
+        init_entry.bind("<KeyRelease>", self._schedule_filter)
         
         # Subject filter
         tk.Label(frame, text="Subject:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR).pack(side="left")
         self.subj_filter = tk.StringVar()
         subj_entry = tk.Entry(frame, textvariable=self.subj_filter, width=25)
         subj_entry.pack(side="left", padx=(5, 10))
-        subj_entry.bind("<KeyRelease>", lambda e: self.apply_filters())
+        subj_entry.bind("<KeyRelease>", self._schedule_filter)
         
         # Clear filters button
         HoverButton(frame, text="Clear Filters", bg="#6B7280", fg="white",
@@ -300,14 +394,71 @@ class EditableComplaintDashboard(tk.Tk):
         # Bindings
         self.tree.bind("<Double-1>", self.on_cell_double_click)
         self.tree.bind("<Button-3>", self.on_right_click)  # Right-click menu
+        self.tree.bind("<Motion>", self._maybe_show_tooltip)
+        self.tree.bind("<Leave>", self._hide_tooltip)
+        
+        # Single reusable tooltip for truncated cells
+        self._tooltip = None
+        self._tooltip_cell = None
+
+    def _maybe_show_tooltip(self, event):
+        """Show the full text of a truncated Summary/Subject cell under the cursor"""
+        iid = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if not iid or not column:
+            self._hide_tooltip()
+            return
+        col_index = int(column.replace("#", "")) - 1
+        cell = (iid, col_index)
+        if cell == self._tooltip_cell:
+            return
+        
+        values = self._current_iids.get(iid)
+        text = values[col_index] if values and 0 <= col_index < len(values) else ""
+        if (col_index >= len(self.all_columns) or self.all_columns[col_index] not in TRUNCATE_COLUMNS
+                or not isinstance(text, str) or len(text) <= DISPLAY_MAX_CHARS):
+            self._hide_tooltip()
+            return
+        
+        if self._tooltip is None:
+            self._tooltip = tk.Toplevel(self)
+            self._tooltip.wm_overrideredirect(True)
+            self._tooltip_label = tk.Label(self._tooltip, bg=CARD_BG, fg=TEXT_COLOR, bd=1, relief="solid",
+                                           justify="left", wraplength=500, padx=6, pady=4,
+                                           font=("Segoe UI", 9))
+            self._tooltip_label.pack()
+        self._tooltip_label.config(text=text)
+        self._tooltip.wm_geometry(f"+{event.x_root + 15}+{event.y_root + 10}")
+        self._tooltip.deiconify()
+        self._tooltip_cell = cell
+
+    def _hide_tooltip(self, event=None):
+        if self._tooltip is not None:
+            self._tooltip.withdraw()
+        self._tooltip_cell = None
 
     def _build_status_bar(self):
         footer = tk.Frame(self, bg=SECONDARY_COLOR)
         footer.pack(fill="x", side="bottom")
         
+        self.load_more_button = HoverButton(footer, text="Load more", bg=BUTTON_COLOR, fg="white",
+                                            font=("Segoe UI", 9), padx=10, pady=2,
+                                            command=self.load_more_rows)
+        
         self.status = tk.StringVar(value="Ready. Double-click cells to edit.")
         tk.Label(footer, textvariable=self.status, bg=SECONDARY_COLOR, fg=TEXT_COLOR,
-                anchor="w", padx=10, pady=5).pack(fill="x")
+                anchor="w", padx=10, pady=5).pack(side="left", fill="x", expand=True)
+
+    def _refresh_category_options(self):
+        """Fill the Category dropdown from the categories present in the DB"""
+        try:
+            rows = self._exec(
+                "SELECT DISTINCT category FROM complaints WHERE category IS NOT NULL ORDER BY category"
+            ).fetchall()
+        except sqlite3.Error:
+            return
+        if rows:
+            self.category_combo["values"] = ["(All)"] + [r[0] for r in rows]
 
     def sort_by_column(self, col):
         """Sort table by clicking column header"""
@@ -327,8 +478,17 @@ class EditableComplaintDashboard(tk.Tk):
         self.subj_filter.set("")
         self.apply_filters()
 
+    def _schedule_filter(self, event=None):
+        """Debounce typing in the filter entries into a single refresh"""
+        if self._filter_after_id is not None:
+            self.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.after(FILTER_DEBOUNCE_MS, self.apply_filters)
+
     def apply_filters(self):
         """Apply all active filters and refresh table"""
+        if self._filter_after_id is not None:
+            self.after_cancel(self._filter_after_id)
+            self._filter_after_id = None
         self.refresh_table()
 
     def set_status(self, msg):
@@ -336,6 +496,7 @@ class EditableComplaintDashboard(tk.Tk):
         self.update_idletasks()
 
     def run_sync_clicked(self):
+        self._flush_edits()
         self.set_status("Running sync... Please wait.")
         thread = threading.Thread(target=self._run_sync_worker, daemon=True)
         thread.start()
@@ -343,6 +504,7 @@ class EditableComplaintDashboard(tk.Tk):
     def _run_sync_worker(self):
         try:
             summary = process()
+            self.after(0, self._refresh_category_options)
             self.after(0, self.refresh_table)
             self.after(0, lambda: self.set_status("Sync complete."))
             self.after(0, lambda: self.show_summary_popup(summary))
@@ -361,11 +523,12 @@ class EditableComplaintDashboard(tk.Tk):
             f"Total Checked: {summary['checked']}\n"
         )
         if summary["excel_written"]:
-            msg += "\nExcel log has been updated."
+            msg += "\nExcel log is being updated."
         messagebox.showinfo("Sync Summary", msg)
 
     def save_to_excel_clicked(self):
         """Save current dashboard state to Excel"""
+        self._flush_edits()
         try:
             from main import export_to_excel
             export_to_excel()
@@ -431,78 +594,151 @@ class EditableComplaintDashboard(tk.Tk):
         
         tk.Button(win, text="Delete", command=delete_selected).pack(pady=10)
 
+    def _current_filters(self):
+        category = self.category_var.get()
+        return {
+            "category": "" if category == "(All)" else category,
+            "pn": self.pn_filter.get().strip(),
+            "initiator": self.initiator_filter.get().strip(),
+            "subject": self.subj_filter.get().strip(),
+        }
+
+    def _build_query(self, filters, sort_col=None, sort_reverse=False, limit=None, offset=0):
+        """Build the SELECT for the visible columns -> (sql, params)
+
+        Filtering and ordering run in SQLite so only matching rows reach Python.
+        Rows come back as plain tuples in tree column order, NULLs already mapped
+        to "": (first_seen_utc, <other columns>..., conversation_id).
+        """
+        select_cols = [DISPLAY_TO_DB.get(c, c) for c in self.all_columns] + ["conversation_id"]
+        where, params = [], []
+        if filters["category"]:
+            where.append("category = ?")
+            params.append(filters["category"])
+        # Plain case-insensitive substring match: no LIKE wildcards or regex to escape
+        for key, db_col in (("pn", "part_number"), ("initiator", "initiator_email"), ("subject", "subject")):
+            if filters[key]:
+                where.append(f"instr(lower({db_col}), ?) > 0")
+                params.append(filters[key].lower())
+
+        sql = ("SELECT " + ", ".join(f"IFNULL([{c}], '')" for c in select_cols[:-1])
+               + ", conversation_id FROM complaints")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        if sort_col:
+            order_col = DISPLAY_TO_DB.get(sort_col, sort_col)
+            direction = "DESC" if sort_reverse else "ASC"
+        else:
+            # Default: sort by date descending (most recent first)
+            order_col, direction = "first_seen_utc", "DESC"
+        sql += f" ORDER BY [{order_col}] IS NULL, [{order_col}] {direction}"
+
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return sql, params
+
     def refresh_table(self):
-        init_db()
-        df = fetch_all_rows()
-        
-        # Clear old rows
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Re-query in the background; results are applied by _apply_rows"""
+        self._flush_edits()
+        sql, params = self._build_query(self._current_filters(), self.sort_column, self.sort_reverse)
+        self._refresh_gen += 1
+        threading.Thread(target=self._refresh_worker, args=(self._refresh_gen, sql, params),
+                         daemon=True).start()
+
+    def _refresh_worker(self, gen, sql, params):
+        try:
+            init_db()
+            # Own connection: the shared one stays on the Tk thread
+            con = connect_db()
+            try:
+                rows = [(row[-1], self._row_values(row)) for row in con.execute(sql, params)]
+                total = con.execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+            finally:
+                con.close()
+            self.after(0, self._apply_rows, gen, rows, total)
+        except Exception as e:
+            print(traceback.format_exc())
+            self.after(0, self.set_status, f"Error refreshing table: {e}")
+
+    def _apply_rows(self, gen, rows, total):
+        if gen != self._refresh_gen:
+            return  # a newer refresh is in flight
+        self._filtered_rows = rows
+        self._total_rows = total
         
-        if df.empty:
+        if not self._total_rows:
+            self._sync_tree([])
+            self.load_more_button.pack_forget()
             self.stats_var.set("No complaints found.")
             return
         
-        # Add ET date column
-        def _to_et_wrapper(x):
-            return to_et_naive(x) if pd.notna(x) and str(x).strip() else None
-        
-        df["__first_et"] = df["first_seen_utc"].apply(_to_et_wrapper) if "first_seen_utc" in df.columns else None
-        
-        # Build display DataFrame
-        display = pd.DataFrame()
-        display["Date (ET)"] = df["__first_et"] if "__first_et" in df else ""
-        display["Initiated By"] = df.get("initiator_email", "")
-        display["P/N"] = df.get("part_number", "")
-        display["Category"] = df.get("category", "")
-        display["Summary"] = df.get("summary", "")
-        display["Subject"] = df.get("subject", "")
-        display["Link"] = df.get("thread_url", "")
-        
-        # Add custom columns
-        for col in self.custom_columns:
-            display[col] = df.get(col, "")
-        
-        # Store conversation_id for editing
-        display["_conversation_id"] = df.get("conversation_id", "")
-        
-        # Apply filters
-        if self.category_var.get() != "(All)":
-            display = display[display["Category"] == self.category_var.get()]
-        
-        if self.pn_filter.get().strip():
-            key = self.pn_filter.get().strip().upper()
-            display = display[display["P/N"].astype(str).str.upper().str.contains(key, na=False)]
-        
-        if self.initiator_filter.get().strip():
-            key = self.initiator_filter.get().strip().lower()
-            display = display[display["Initiated By"].astype(str).str.lower().str.contains(key, na=False)]
-        
-        if self.subj_filter.get().strip():
-            key = self.subj_filter.get().strip().lower()
-            display = display[display["Subject"].astype(str).str.lower().str.contains(key, na=False)]
-        
-        # Sort if column selected
-        if self.sort_column and self.sort_column in display.columns:
-            display = display.sort_values(self.sort_column, ascending=not self.sort_reverse, na_position="last")
+        self._sync_tree(self._filtered_rows[:RENDER_BATCH])
+        self._update_load_more()
+        self.set_status(f"Table refreshed. Showing {self._rendered} of {len(self._filtered_rows)} "
+                        f"matching ({self._total_rows} total).")
+
+    @staticmethod
+    def _row_values(row):
+        first_seen = row[0]
+        first_et = (_to_et_cached(first_seen) if first_seen.strip() else None) or ""
+        return (first_et,) + row[1:-1]
+
+    def _display_values(self, values):
+        """Shorten long text cells for the tree; _current_iids keeps the full values"""
+        shown = list(values)
+        for col in TRUNCATE_COLUMNS:
+            idx = self.all_columns.index(col)
+            text = shown[idx]
+            if isinstance(text, str) and len(text) > DISPLAY_MAX_CHARS:
+                shown[idx] = text[:DISPLAY_MAX_CHARS] + "…"
+        return shown
+
+    def _sync_tree(self, rows):
+        """Make the tree show `rows` ((iid, values) pairs) in order, touching only items that changed
+
+        Items use conversation_id as their iid, so rows that stay in the result
+        are updated/moved in place instead of being deleted and re-inserted.
+        """
+        current = self._current_iids
+        wanted = dict(rows)
+        
+        stale = [iid for iid in current if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+        
+        # Kept items only need moving when their relative order changed (e.g. re-sort)
+        kept = [iid for iid in wanted if iid in current]
+        reorder = kept != list(self.tree.get_children())
+        
+        for index, (iid, values) in enumerate(wanted.items()):
+            if iid not in current:
+                self.tree.insert("", index, iid=iid, values=self._display_values(values), tags=(iid,))
+                continue
+            if current[iid] != values:
+                self.tree.item(iid, values=self._display_values(values))
+            if reorder:
+                self.tree.move(iid, "", index)
+        
+        self._current_iids = wanted
+        self._rendered = len(wanted)
+
+    def _update_load_more(self):
+        if self._rendered < len(self._filtered_rows):
+            self.load_more_button.pack(side="right", padx=10, pady=2)
         else:
-            # Default: sort by date descending (most recent first)
-            if "Date (ET)" in display.columns:
-                display = display.sort_values("Date (ET)", ascending=False, na_position="last")
-        
-        # Update category dropdown
-        if "Category" in df.columns:
-            cats = ["(All)"] + sorted(df["Category"].dropna().unique().tolist())
-            self.category_combo["values"] = cats
-        
-        # Insert rows
-        for _, row in display.iterrows():
-            values = [row.get(col, "") for col in self.all_columns]
-            conv_id = row.get("_conversation_id", "")
-            self.tree.insert("", "end", values=values, tags=(conv_id,))
-        
-        self.stats_var.set(f"Total: {len(df)} | Displayed: {len(display)}")
-        self.set_status(f"Table refreshed. Showing {len(display)} of {len(df)} complaints.")
+            self.load_more_button.pack_forget()
+        self.stats_var.set(f"Total: {self._total_rows} | Displayed: {len(self._filtered_rows)}")
+
+    def load_more_rows(self):
+        """Append the next slice of filtered rows to the tree"""
+        for iid, values in self._filtered_rows[self._rendered:self._rendered + RENDER_BATCH]:
+            self.tree.insert("", "end", iid=iid, values=self._display_values(values), tags=(iid,))
+            self._current_iids[iid] = values
+        self._rendered = len(self._current_iids)
+        self._update_load_more()
+        self.set_status(f"Showing {self._rendered} of {len(self._filtered_rows)} matching complaints.")
 
     def on_cell_double_click(self, event):
         """Edit cell on double-click"""
@@ -524,12 +760,12 @@ class EditableComplaintDashboard(tk.Tk):
         if col_name == "Link":
             url = self.tree.item(item, "values")[col_index]
             if url:
-                import webbrowser
                 webbrowser.open(url)
             return
         
-        # Get current value
-        current_value = self.tree.item(item, "values")[col_index]
+        # Get current value (full text, the tree may show it truncated)
+        values = list(self._current_iids.get(item) or self.tree.item(item, "values"))
+        current_value = values[col_index]
         
         # Show edit dialog
         new_value = simpledialog.askstring("Edit Cell", f"Edit {col_name}:", initialvalue=current_value)
@@ -537,9 +773,9 @@ class EditableComplaintDashboard(tk.Tk):
             return
         
         # Update in tree
-        values = list(self.tree.item(item, "values"))
         values[col_index] = new_value
-        self.tree.item(item, values=values)
+        self.tree.item(item, values=self._display_values(values))
+        self._current_iids[item] = tuple(values)
         
         # Update in database
         conv_id = self.tree.item(item, "tags")[0]
@@ -548,30 +784,59 @@ class EditableComplaintDashboard(tk.Tk):
         self.set_status(f"Updated {col_name} for complaint {conv_id[:8]}...")
 
     def _update_cell_in_db(self, conversation_id, col_name, new_value):
-        """Update a single cell in the database"""
+        """Queue a single cell update; written by the next _flush_edits"""
+        db_col = DISPLAY_TO_DB.get(col_name, col_name)
+        self._pending_updates.setdefault(db_col, []).append((new_value, conversation_id))
+        self._queue_write()
+
+    def _queue_write(self):
+        """Schedule a flush, or flush now once the buffer is large enough"""
+        self._pending_count += 1
+        if self._pending_count >= FLUSH_MAX_ROWS:
+            self._flush_edits()
+        elif self._flush_after_id is None:
+            self._flush_after_id = self.after(FLUSH_DELAY_MS, self._flush_edits)
+
+    def _flush_edits(self):
+        """Write all pending updates/deletes in a single transaction"""
+        if self._flush_after_id is not None:
+            self.after_cancel(self._flush_after_id)
+            self._flush_after_id = None
+        if not self._pending_count:
+            return
+
+        updates, deletes = self._pending_updates, self._pending_deletes
+        self._pending_updates, self._pending_deletes, self._pending_count = {}, [], 0
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            
-            # Map display names to DB columns
-            col_map = {
-                "Date (ET)": "first_seen_utc",
-                "Initiated By": "initiator_email",
-                "P/N": "part_number",
-                "Category": "category",
-                "Summary": "summary",
-                "Subject": "subject",
-                "Link": "thread_url"
-            }
-            
-            db_col = col_map.get(col_name, col_name)
-            
-            cur.execute(f"UPDATE complaints SET [{db_col}]=? WHERE conversation_id=?", 
-                       (new_value, conversation_id))
-            con.commit()
-            con.close()
+            self._exec("BEGIN")
+            for db_col, rows in updates.items():
+                self.con.executemany(f"UPDATE complaints SET [{db_col}]=? WHERE conversation_id=?", rows)
+            if deletes:
+                self.con.executemany("DELETE FROM complaints WHERE conversation_id=?", deletes)
+            self._exec("COMMIT")
+            if self._flush_retrying:
+                # A refresh while the edits were held back showed the old values
+                self._flush_retrying = False
+                self.set_status("Changes saved.")
+                self.refresh_table()
         except Exception as e:
-            messagebox.showerror("Database Error", f"Failed to update: {e}")
+            if self.con.in_transaction:
+                self._exec("ROLLBACK")
+            if isinstance(e, sqlite3.OperationalError):
+                # Locked/busy: put the edits back in front of any made since and retry,
+                # so what the tree shows still gets written
+                for db_col, rows in updates.items():
+                    self._pending_updates[db_col] = rows + self._pending_updates.get(db_col, [])
+                self._pending_deletes = deletes + self._pending_deletes
+                self._pending_count += sum(map(len, updates.values())) + len(deletes)
+                self._flush_retrying = True
+                if self._flush_after_id is None:
+                    self._flush_after_id = self.after(FLUSH_RETRY_MS, self._flush_edits)
+                self.set_status(f"Database busy, changes not saved yet ({e}); retrying...")
+            else:
+                messagebox.showerror("Database Error", f"Failed to save changes: {e}")
+                # The edits are dropped; show what the database actually holds
+                self.refresh_table()
 
     def on_right_click(self, event):
         """Show context menu on right-click"""
@@ -594,18 +859,15 @@ class EditableComplaintDashboard(tk.Tk):
             return
         
         conv_id = self.tree.item(item, "tags")[0]
-        
-        try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            cur.execute("DELETE FROM complaints WHERE conversation_id=?", (conv_id,))
-            con.commit()
-            con.close()
-            
-            self.tree.delete(item)
-            self.set_status(f"Deleted complaint {conv_id[:8]}...")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete: {e}")
+
+        self._pending_deletes.append((conv_id,))
+        self._queue_write()
+        self._filtered_rows = [r for r in self._filtered_rows if r[0] != conv_id]
+        self._current_iids.pop(item, None)
+        self._rendered = len(self._current_iids)
+
+        self.tree.delete(item)
+        self.set_status(f"Deleted complaint {conv_id[:8]}...")
 
     def open_row_link(self, item):
         """Open the thread URL for a row"""
@@ -613,7 +875,6 @@ class EditableComplaintDashboard(tk.Tk):
         link_index = self.all_columns.index("Link")
         url = values[link_index]
         if url:
-            import webbrowser
             webbrowser.open(url)
 
 
@@ -0,0 +1,44 @@
+"""
+JSON helpers that use orjson when it is installed, stdlib json otherwise.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(s):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+class _MsalJson:
+    """Stand-in for the `json` module inside msal.token_cache (formatting kwargs are ignored)"""
+
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return loads(s)
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return dumps(obj)
+
+
+def patch_msal_token_cache():
+    """Point MSAL's cache (de)serialization at orjson; only msal.token_cache is affected"""
+    if orjson is None:
+        return
+    import msal.token_cache
+    msal.token_cache.json = _MsalJson()
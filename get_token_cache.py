@@ -4,9 +4,11 @@ Signs into Microsoft and saves a token file for GitHub Actions.
 """
 import os
 import sys
+import threading
 import webbrowser
 
 from msal import PublicClientApplication, SerializableTokenCache
+from fast_json import patch_msal_token_cache
 
 # Hardcoded - same values as in .env
 TENANT_ID = "422e0e56-e8fe-4fc5-8554-b9b89f3cadac"
@@ -14,12 +16,16 @@ CLIENT_ID = "4d218a58-d028-4fa3-a0dc-8c8df56fb413"
 
 AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
 SCOPES = ["Mail.Read", "User.Read"]
+DEVICE_LOGIN_URL = "https://microsoft.com/devicelogin"
 
 def main():
-    print("=" * 50)
-    print("  MAC Quality Dashboard - Microsoft Login")
-    print("=" * 50)
-    print()
+    patch_msal_token_cache()
+    sys.stdout.write(
+        f"{'=' * 50}\n"
+        "  MAC Quality Dashboard - Microsoft Login\n"
+        f"{'=' * 50}\n\n"
+    )
+    sys.stdout.flush()
 
     cache = SerializableTokenCache()
     app = PublicClientApplication(CLIENT_ID, authority=AUTHORITY, token_cache=cache)
@@ -31,22 +37,24 @@ def main():
         sys.exit(1)
 
     code = flow["user_code"]
-    print(f"Your login code is:  {code}")
-    print()
-    print("A browser window will open. If it doesn't, go to:")
-    print("  https://microsoft.com/devicelogin")
-    print()
-    print(f"Enter the code:  {code}")
-    print()
+    sys.stdout.write(
+        f"Your login code is:  {code}\n\n"
+        "A browser window will open. If it doesn't, go to:\n"
+        f"  {DEVICE_LOGIN_URL}\n\n"
+        f"Enter the code:  {code}\n\n"
+        "Waiting for you to sign in...\n\n"
+    )
+    sys.stdout.flush()
 
-    # Try to open the browser automatically
-    try:
-        webbrowser.open("https://microsoft.com/devicelogin")
-    except Exception:
-        pass
+    # Open the browser in the background so device-flow polling starts right away
+    # (webbrowser can block while xdg-open/the browser starts up)
+    def _open_browser():
+        try:
+            webbrowser.open_new_tab(DEVICE_LOGIN_URL)
+        except Exception:
+            pass
 
-    print("Waiting for you to sign in...")
-    print()
+    threading.Thread(target=_open_browser, daemon=True).start()
 
     result = app.acquire_token_by_device_flow(flow)
 
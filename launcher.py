@@ -11,9 +11,28 @@ from tkinter import messagebox
 import webbrowser
 import threading
 import time
+import socket
 
 # Import authentication from main.py
-from main import app as msal_app, SCOPES, BASE_DIR
+from main import get_msal_app, save_token_cache, SCOPES, BASE_DIR
+
+# Streamlit readiness polling: 100ms, 200ms, 400ms ... capped at 2s
+POLL_START_MS = 100
+POLL_MAX_MS = 2000
+STARTUP_TIMEOUT_S = 30
+
+# argv for the in-process `streamlit run`; slot 2 takes the script path
+_STREAMLIT_ARGV_TEMPLATE = [
+    "streamlit",
+    "run",
+    None,
+    "--server.port=8501",
+    "--server.headless=true",
+    "--browser.gatherUsageStats=false",
+    "--server.fileWatcherType=none",
+    "--server.runOnSave=false",
+    "--global.developmentMode=false",
+]
 
 
 class AuthLauncher(tk.Tk):
@@ -108,25 +127,32 @@ class AuthLauncher(tk.Tk):
         self.info_label.pack(pady=20)
     
     def check_auth_status(self):
-        """Check if user is already authenticated"""
+        """Check if user is already authenticated, off the Tk thread (a silent
+        token refresh can go over the network)"""
+        threading.Thread(target=self._check_auth_worker, daemon=True).start()
+    
+    def _check_auth_worker(self):
+        authenticated = False
         try:
+            msal_app = get_msal_app()
             accounts = msal_app.get_accounts()
             if accounts:
                 result = msal_app.acquire_token_silent(SCOPES, account=accounts[0])
-                if result and "access_token" in result:
-                    self.status_label.config(text="Already authenticated!", fg="#059669")
-                    self.info_label.config(text="You're signed in and ready to go.\nClick below to launch the dashboard.")
-                    self.launch_button.pack(pady=10)
-                    return
-            
-            self.status_label.config(text="Authentication Required", fg="#D97706")
-            self.info_label.config(text="You need to sign in with Microsoft before using the dashboard.\nClick below to authenticate.")
-            self.auth_button.pack(pady=10)
-            
-        except:
-            self.status_label.config(text="Authentication Required", fg="#D97706")
-            self.info_label.config(text="You need to sign in with Microsoft before using the dashboard.\nClick below to authenticate.")
-            self.auth_button.pack(pady=10)
+                authenticated = bool(result and "access_token" in result)
+        except Exception:
+            pass
+        self.after(0, self._show_auth_status, authenticated)
+    
+    def _show_auth_status(self, authenticated):
+        if authenticated:
+            self.status_label.config(text="Already authenticated!", fg="#059669")
+            self.info_label.config(text="You're signed in and ready to go.\nClick below to launch the dashboard.")
+            self.launch_button.pack(pady=10)
+            return
+        
+        self.status_label.config(text="Authentication Required", fg="#D97706")
+        self.info_label.config(text="You need to sign in with Microsoft before using the dashboard.\nClick below to authenticate.")
+        self.auth_button.pack(pady=10)
     
     def authenticate(self):
         """Start authentication flow"""
@@ -135,6 +161,7 @@ class AuthLauncher(tk.Tk):
         self.update()
         
         try:
+            msal_app = get_msal_app()
             flow = msal_app.initiate_device_flow(scopes=SCOPES)
             
             if "user_code" not in flow:
@@ -181,7 +208,9 @@ class AuthLauncher(tk.Tk):
             messagebox.showinfo("Copied", "Code copied to clipboard!")
         
         def open_browser():
-            webbrowser.open("https://microsoft.com/devicelogin")
+            # Off the Tk thread: webbrowser can block while the browser starts
+            threading.Thread(target=webbrowser.open_new_tab,
+                             args=("https://microsoft.com/devicelogin",), daemon=True).start()
         
         tk.Button(button_frame, text="Copy Code", command=copy_code, font=("Segoe UI", 10), padx=15, pady=5).pack(side="left", padx=5)
         tk.Button(button_frame, text="Open Login Page", command=open_browser, font=("Segoe UI", 10, "bold"), bg="#0078D4", fg="white", padx=15, pady=5).pack(side="left", padx=5)
@@ -190,9 +219,10 @@ class AuthLauncher(tk.Tk):
         
         def complete_auth():
             try:
-                result = msal_app.acquire_token_by_device_flow(flow)
+                result = get_msal_app().acquire_token_by_device_flow(flow)
                 
                 if "access_token" in result:
+                    save_token_cache()
                     popup.destroy()
                     self.status_label.config(text="Authentication successful!", fg="#059669")
                     self.info_label.config(text="You're now signed in.\nClick below to launch the dashboard.")
@@ -234,10 +264,9 @@ class AuthLauncher(tk.Tk):
                     bundle_dir = os.path.dirname(os.path.abspath(__file__))
                     exe_dir = bundle_dir
                 
-                # Add to path if not already there
-                for path in [bundle_dir, exe_dir]:
-                    if path not in sys.path:
-                        sys.path.insert(0, path)
+                # Add to path if not already there (exe_dir ends up first, as before)
+                on_path = set(sys.path)
+                sys.path[:0] = [p for p in dict.fromkeys((exe_dir, bundle_dir)) if p not in on_path]
                 
                 # Change working directory so DB/Excel files are created next to EXE
                 os.chdir(exe_dir)
@@ -248,15 +277,9 @@ class AuthLauncher(tk.Tk):
                 # Set up arguments for Streamlit
                 streamlit_app_path = os.path.join(bundle_dir, "streamlit_app.py")
                 
-                sys.argv = [
-                    "streamlit",
-                    "run",
-                    streamlit_app_path,
-                    "--server.port=8501",
-                    "--server.headless=true",
-                    "--browser.gatherUsageStats=false",
-                    "--server.fileWatcherType=none"
-                ]
+                argv = list(_STREAMLIT_ARGV_TEMPLATE)
+                argv[2] = streamlit_app_path
+                sys.argv = argv
                 
                 self.streamlit_running = True
                 
@@ -276,59 +299,56 @@ class AuthLauncher(tk.Tk):
         self.streamlit_thread = threading.Thread(target=run_streamlit, daemon=True)
         self.streamlit_thread.start()
         
-        # Wait a bit, then open browser
-        self.after(5000, self.open_dashboard)
+        # Open the browser once the server is listening
+        self.after(POLL_START_MS, self.open_dashboard)
     
     def open_dashboard(self):
-        """Open dashboard in browser"""
-        import socket
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                result = s.connect_ex(('localhost', 8501))
-                if result == 0:
-                    # Streamlit is running
-                    webbrowser.open("http://localhost:8501")
-                    
-                    messagebox.showinfo(
-                        "Dashboard Launched",
-                        "The dashboard has been opened in your browser!\n\n"
-                        "You can minimize this launcher window.\n"
-                        "The dashboard will continue running."
-                    )
-                    
-                    # Re-enable button
-                    self.launch_button.config(state="normal")
-                    self.status_label.config(text="Dashboard is running!", fg="#059669")
-                    self.info_label.config(text="Browser opened at http://localhost:8501\nYou can minimize this window.")
-                else:
-                    # Not running yet - wait and retry
-                    self.after(3000, self.retry_open)
-        except:
-            self.after(3000, self.retry_open)
+        """Open dashboard in browser as soon as Streamlit accepts connections"""
+        self._poll_delay_ms = POLL_START_MS
+        self._poll_deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        self._poll_streamlit()
     
-    def retry_open(self):
-        """Retry opening dashboard"""
-        import socket
+    def _poll_streamlit(self):
+        """Probe the port with exponential backoff until Streamlit is up or gives up"""
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                result = s.connect_ex(('localhost', 8501))
-                if result == 0:
-                    webbrowser.open("http://localhost:8501")
-                    messagebox.showinfo("Dashboard Launched", "Dashboard opened in your browser!")
-                    self.launch_button.config(state="normal")
-                    self.status_label.config(text="Dashboard is running!", fg="#059669")
-                else:
-                    messagebox.showerror(
-                        "Streamlit Not Started",
-                        "Streamlit failed to start.\n\n"
-                        "This may be a build issue.\n"
-                        "Try rebuilding with: pyinstaller --clean MAC_Dashboard_SingleFile.spec"
-                    )
-                    self.launch_button.config(state="normal")
-                    self.status_label.config(text="Launch failed", fg="#DC2626")
-        except:
-            messagebox.showerror("Error", "Could not verify Streamlit status.")
+                listening = s.connect_ex(('localhost', 8501)) == 0
+        except OSError:
+            listening = False
+        
+        if listening:
+            webbrowser.open("http://localhost:8501")
+            
+            messagebox.showinfo(
+                "Dashboard Launched",
+                "The dashboard has been opened in your browser!\n\n"
+                "You can minimize this launcher window.\n"
+                "The dashboard will continue running."
+            )
+            
+            # Re-enable button
+            self.launch_button.config(state="normal")
+            self.status_label.config(text="Dashboard is running!", fg="#059669")
+            self.info_label.config(text="Browser opened at http://localhost:8501\nYou can minimize this window.")
+            return
+        
+        if not self.streamlit_thread.is_alive():
+            # run_streamlit already reported why it stopped
+            return
+        
+        if time.monotonic() >= self._poll_deadline:
+            messagebox.showerror(
+                "Streamlit Not Started",
+                "Streamlit failed to start.\n\n"
+                "This may be a build issue.\n"
+                "Try rebuilding with: pyinstaller --clean MAC_Dashboard_SingleFile.spec"
+            )
             self.launch_button.config(state="normal")
+            self.status_label.config(text="Launch failed", fg="#DC2626")
+            return
+        
+        self.after(self._poll_delay_ms, self._poll_streamlit)
+        self._poll_delay_ms = min(self._poll_delay_ms * 2, POLL_MAX_MS)
 
 
 def main():
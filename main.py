@@ -1,20 +1,39 @@
 import os
 import sys
 import re
-import json
+import random
 import time
+import atexit
+import functools
+import hashlib
 import sqlite3
 import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from urllib.parse import urlencode
+from urllib.parse import quote, urlencode
 from dateutil.parser import parse as dt_parse
-from google.api_core import retry as api_retry
 from dateutil.tz import tzutc
 
 import requests
-import pandas as pd
-from bs4 import BeautifulSoup
 from msal import PublicClientApplication, SerializableTokenCache
+import fast_json
+from fast_json import patch_msal_token_cache
+
+try:
+    from selectolax.parser import HTMLParser  # optional, much faster than bs4
+except ImportError:
+    HTMLParser = None
+
+try:
+    from zoneinfo import ZoneInfo
+    _ET = ZoneInfo("America/New_York")
+except Exception:  # no zoneinfo/tzdata; callers keep their old fallbacks
+    _ET = None
+
+# "3:04 PM 01/05/2025" without the hour's leading zero (flag differs on Windows)
+_ET_FMT = "%#I:%M %p %m/%d/%Y" if os.name == "nt" else "%-I:%M %p %m/%d/%Y"
 
 from typing import Tuple
 
@@ -57,7 +76,20 @@ BASE_DIR = base_dir()
 
 # Load environment variables from Streamlit secrets (cloud) or .env (local)
 CONFIG_SOURCE = "unknown"
+
+# Where Streamlit looks for secrets.toml (project dir, cwd, user home). Touching
+# st.secrets without one of these makes Streamlit search and raise, so local and
+# EXE runs check for the files first and go straight to .env.
+_SECRETS_FILES = {
+    os.path.join(BASE_DIR, ".streamlit", "secrets.toml"),
+    os.path.join(os.getcwd(), ".streamlit", "secrets.toml"),
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+}
+_HAS_SECRETS = _HAS_STREAMLIT and any(os.path.exists(p) for p in _SECRETS_FILES)
+
 try:
+    if not _HAS_SECRETS:
+        raise KeyError("credentials")
     # Try Streamlit secrets first (for cloud deployment)
     GEMINI_API_KEY = st.secrets["credentials"]["GEMINI_API_KEY"]
     TENANT_ID = st.secrets["credentials"]["TENANT_ID"]
@@ -83,14 +115,14 @@ except (KeyError, FileNotFoundError, AttributeError):
     PN_MASTER_PATH = os.getenv("PN_MASTER_PATH", os.path.join(BASE_DIR, "pn_master.xlsx"))
     CONFIG_SOURCE = ".env file"
 
-# Quiet down gRPC / absl noise BEFORE importing google-generativeai
+# Quiet down gRPC / absl noise BEFORE google-generativeai gets imported.
+# pandas, bs4 and google-generativeai are imported inside the functions that use
+# them, so the launcher and dashboard don't pay for them at startup.
 os.environ.setdefault("GRPC_VERBOSITY", "ERROR")
 os.environ.setdefault("GRPC_LOG_SEVERITY", "ERROR")
 os.environ.setdefault("GLOG_minloglevel", "2")
 os.environ.setdefault("ABSL_LOG_SEVERITY", "info")
 
-import google.generativeai as genai  # noqa: E402
-
 DB_PATH = os.path.join(BASE_DIR, "complaints.db")
 EXCEL_PATH = os.path.join(BASE_DIR, "Complaint_Log.xlsx")
 
@@ -101,22 +133,33 @@ def _mask_key(k: str) -> str:
         return "*" * (len(k) - 2) + k[-2:]
     return k[:4] + "..." + k[-4:]
 
-def _gemini_preflight(genai_mod, api_key: str, model_name: str = "gemini-3.1-pro-preview") -> bool:
-    """Check if Gemini API key works"""
+@functools.lru_cache(maxsize=4)
+def _gemini_ping(genai_mod, api_key: str, model_name: str) -> bool:
+    # Only successes are memoized (lru_cache doesn't cache raised exceptions), so a
+    # key that worked once isn't re-pinged on every sync but a failure is retried
+    genai_mod.configure(api_key=api_key, transport="rest")
+    model = genai_mod.GenerativeModel(
+        model_name=model_name,
+        generation_config={"response_mime_type": "application/json", "temperature": 0},
+    )
+    resp = model.generate_content("Return {\"ping\":true}")
+    _ = getattr(resp, "text", None)
+    return True
+
+def _gemini_preflight_error(model_name: str = "gemini-3.1-pro-preview") -> str:
+    """Check if the Gemini API key works (once per process): "" if so, else the error.
+
+    Network only, no st.* calls: process() runs it on a worker thread, where
+    Streamlit has no script context and would drop any message.
+    """
+    import google.generativeai as genai
     try:
-        genai_mod.configure(api_key=api_key)
-        model = genai_mod.GenerativeModel(
-            model_name=model_name,
-            generation_config={"response_mime_type": "application/json", "temperature": 0},
-        )
-        resp = model.generate_content("Return {\"ping\":true}")
-        _ = getattr(resp, "text", None)
-        return True
+        _gemini_ping(genai, GEMINI_API_KEY, model_name)
+        return ""
     except Exception as e:
-        st.error(f"Gemini API key invalid or expired: {e}")
-        return False
+        return str(e)
 
-from prompts import PROMPT_TEXT
+from prompts import SYSTEM_PROMPT, USER_TEMPLATE_PARTS
 
 # ============================
 # Complaint keyword gate list
@@ -128,15 +171,23 @@ KEYWORDS = [
     "RMA","return","replacement","rework"
 ]
 
-STRONG_SIGNALS = {"ncmr", "scar", "dmr", "rma", "nonconformance", "non-conformance", "ncr", "car", "8d"}
+# Lowercased once for contains_keywords(); a keyword containing another one
+# ("damaged" / "damage") can never change an any() result, so it's dropped.
+_KEYWORDS_LOWER = tuple(dict.fromkeys(k.lower() for k in KEYWORDS))
+_KEYWORDS_LOWER = tuple(
+    k for k in _KEYWORDS_LOWER
+    if not any(o != k and o in k for o in _KEYWORDS_LOWER)
+)
 
+STRONG_SIGNALS = frozenset({"ncmr", "scar", "dmr", "rma", "nonconformance", "non-conformance", "ncr", "car", "8d"})
 
-SENDER_BLOCKLIST = {
+
+SENDER_BLOCKLIST = frozenset({
     "eminder@culturewise.com",
     "no-reply@culturewise.com",
-}
-DOMAIN_BLOCKLIST = {"culturewise.com"}
-SUBJECT_BLOCK_PHRASES = {
+})
+DOMAIN_BLOCKLIST = frozenset({"culturewise.com"})
+SUBJECT_BLOCK_PHRASES = frozenset({
     "lesson of the week",
     "reminder:",
     "training",
@@ -146,7 +197,17 @@ SUBJECT_BLOCK_PHRASES = {
     "weekly update",
     "out of office",
     "automatic reply",
-}
+})
+
+# Case-folded once for is_noise_email(); as with keywords, a phrase containing
+# another phrase ("guide to best practices") can't change the result
+_SENDER_BLOCKLIST_LOWER = frozenset(map(str.lower, SENDER_BLOCKLIST))
+_DOMAIN_BLOCKLIST_LOWER = frozenset(map(str.lower, DOMAIN_BLOCKLIST))
+_SUBJECT_PHRASES_LOWER = frozenset(map(str.lower, SUBJECT_BLOCK_PHRASES))
+_SUBJECT_PHRASES_LOWER = tuple(
+    p for p in _SUBJECT_PHRASES_LOWER
+    if not any(o != p and o in p for o in _SUBJECT_PHRASES_LOWER)
+)
 
 MISSING_PN = "No part number provided"
 
@@ -157,27 +218,97 @@ AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
 SCOPES = ["Mail.Read", "User.Read"]
 SCOPES_SEND = ["Mail.Read", "Mail.Send", "User.Read"]
 
-# Build MSAL app - in headless mode, load cached refresh token
+# Build MSAL app. Unless a headless run gets its cache from the MSAL_TOKEN_CACHE
+# env var, the cache lives in msal_token_cache.txt (the file get_token_cache.py
+# writes) so every launcher/CLI run starts from the last sign-in.
+patch_msal_token_cache()  # orjson for cache (de)serialization when available
 _token_cache = SerializableTokenCache()
-if HEADLESS:
-    _cache_data = os.getenv("MSAL_TOKEN_CACHE", "")
-    # Also check for msal_token_cache.txt file (from get_token_cache.py)
-    if not _cache_data:
-        _cache_file = os.path.join(BASE_DIR, "msal_token_cache.txt")
-        if os.path.exists(_cache_file):
-            with open(_cache_file, "r") as f:
-                _cache_data = f.read().strip()
-            print(f"[INFO] Loaded MSAL token cache from {_cache_file}")
-    if _cache_data:
+_cache_file = os.path.join(BASE_DIR, "msal_token_cache.txt")
+_cache_data = os.getenv("MSAL_TOKEN_CACHE", "") if HEADLESS else ""
+_cache_from_file = not _cache_data
+if _cache_from_file and os.path.exists(_cache_file):
+    with open(_cache_file, "r") as f:
+        _cache_data = f.read().strip()
+    print(f"[INFO] Loaded MSAL token cache from {_cache_file}")
+if _cache_data:
+    try:
         _token_cache.deserialize(_cache_data)
-        if not os.getenv("MSAL_TOKEN_CACHE"):
-            print("[INFO] Loaded MSAL token cache from file")
-        else:
-            print("[INFO] Loaded MSAL token cache from MSAL_TOKEN_CACHE env var")
-    else:
-        print("[WARN] HEADLESS mode but no MSAL_TOKEN_CACHE found")
-
-app = PublicClientApplication(CLIENT_ID, authority=AUTHORITY, token_cache=_token_cache)
+    except ValueError as e:
+        print(f"[WARN] Ignoring unreadable MSAL token cache: {e}")
+    if not _cache_from_file:
+        print("[INFO] Loaded MSAL token cache from MSAL_TOKEN_CACHE env var")
+elif HEADLESS:
+    print("[WARN] HEADLESS mode but no MSAL_TOKEN_CACHE found")
+
+def _new_msal_app(client_id: str) -> PublicClientApplication:
+    return PublicClientApplication(client_id, authority=AUTHORITY, token_cache=_token_cache)
+
+# One MSAL app per process so every caller shares its in-memory cache. Under a
+# Streamlit server it lives in st.cache_resource, which also survives reruns and
+# module reloads; launcher/CLI/headless runs just memoize it.
+_local_msal_app = functools.lru_cache(maxsize=None)(_new_msal_app)
+if _HAS_STREAMLIT:
+    _server_msal_app = st.cache_resource(show_spinner=False)(_new_msal_app)
+
+def get_msal_app() -> PublicClientApplication:
+    if _HAS_STREAMLIT and st.runtime.exists():
+        return _server_msal_app(CLIENT_ID)
+    return _local_msal_app(CLIENT_ID)
+
+def save_token_cache():
+    """Write the file-backed cache back, only if MSAL added or rotated tokens in it"""
+    if not (_cache_from_file and _token_cache.has_state_changed):
+        return
+    tmp_path = None
+    try:
+        # Temp file + replace so a concurrent reader never sees a half-written cache
+        fd, tmp_path = tempfile.mkstemp(prefix="msal_token_cache_", suffix=".tmp",
+                                        dir=os.path.dirname(_cache_file))
+        with os.fdopen(fd, "w") as f:
+            f.write(_token_cache.serialize())
+        os.replace(tmp_path, _cache_file)
+        _token_cache.has_state_changed = False
+    except OSError as e:
+        print(f"[WARN] Could not save MSAL token cache: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+atexit.register(save_token_cache)
+
+# (client_id, home_account_id, scopes) -> (access_token, reuse_until). A headless
+# sync asks for a token per Graph page and per batch (from worker threads too); this
+# skips MSAL's cache lookup + token validation until shortly before expiry.
+# Streamlit mode doesn't use it: st.session_state.auth keeps each session's token.
+_TOKEN_MEMO = {}
+_TOKEN_MEMO_LOCK = threading.Lock()
+_TOKEN_REFRESH_MARGIN_S = 300
+
+def _acquire_token_silent(app, use_memo: bool = False):
+    """(access_token or None, MSAL result or None) for the first cached account"""
+    accounts = app.get_accounts()
+    live = {a.get("home_account_id") for a in accounts}
+    with _TOKEN_MEMO_LOCK:
+        # Accounts removed from the MSAL cache take their memoized tokens with them
+        for key in [k for k in _TOKEN_MEMO if k[0] == app.client_id and k[1] not in live]:
+            del _TOKEN_MEMO[key]
+    if not accounts:
+        return None, None
+    key = (app.client_id, accounts[0].get("home_account_id"), tuple(SCOPES))
+    if use_memo:
+        with _TOKEN_MEMO_LOCK:
+            memo = _TOKEN_MEMO.get(key)
+        if memo and time.time() < memo[1]:
+            return memo[0], None
+    result = app.acquire_token_silent(SCOPES, account=accounts[0])
+    if result and "access_token" in result:
+        if use_memo:
+            reuse_until = time.time() + result.get("expires_in", 3600) - _TOKEN_REFRESH_MARGIN_S
+            with _TOKEN_MEMO_LOCK:
+                _TOKEN_MEMO[key] = (result["access_token"], reuse_until)
+        return result["access_token"], result
+    with _TOKEN_MEMO_LOCK:
+        _TOKEN_MEMO.pop(key, None)
+    return None, result or {}
 
 def get_token():
     """
@@ -185,56 +316,50 @@ def get_token():
     - Streamlit mode: uses session state (device flow auth from sidebar)
     - Headless mode: uses cached refresh token (delegated permissions)
     """
+    # Streamlit mode: check session state
+    if not HEADLESS and hasattr(st, 'session_state') and hasattr(st.session_state, 'get'):
+        auth = st.session_state.get("auth")  # (access_token, expires_at)
+        if auth and time.time() < auth[1]:
+            return auth[0]
+
+    app = get_msal_app()
+    token, result = _acquire_token_silent(app, use_memo=HEADLESS)
     if HEADLESS:
         # Use cached refresh token (delegated permissions, no app-level needed)
-        accounts = app.get_accounts()
-        if not accounts:
+        if token:
+            return token
+        if result is None:
             raise RuntimeError(
                 "No cached accounts found. Run 'python get_token_cache.py' locally "
                 "and save the output as the MSAL_TOKEN_CACHE GitHub secret."
             )
-        result = app.acquire_token_silent(SCOPES, account=accounts[0])
-        if result and "access_token" in result:
-            return result["access_token"]
         raise RuntimeError(
             f"Token refresh failed: {result.get('error_description', 'Unknown error')}. "
             "The refresh token may have expired (90 days). "
             "Re-run 'python get_token_cache.py' to get a new one."
         )
 
-    # Streamlit mode: check session state
-    if hasattr(st, 'session_state') and hasattr(st.session_state, '__contains__'):
-        if "access_token" in st.session_state and "token_expires_at" in st.session_state:
-            if time.time() < st.session_state.token_expires_at:
-                return st.session_state.access_token
-
-    # Try silent authentication with cached account
-    accounts = app.get_accounts()
-    if accounts:
-        result = app.acquire_token_silent(SCOPES, account=accounts[0])
-        if result and "access_token" in result:
-            if hasattr(st, 'session_state') and hasattr(st.session_state, '__setattr__'):
-                st.session_state.access_token = result["access_token"]
-                st.session_state.token_expires_at = time.time() + result.get("expires_in", 3600)
-            return result["access_token"]
+    if token:
+        if result and hasattr(st, 'session_state') and hasattr(st.session_state, '__setattr__'):
+            st.session_state.auth = (token, time.time() + result.get("expires_in", 3600))
+        return token
 
     raise RuntimeError("Authentication required. Please authenticate in the sidebar.")
 
 SUBJECT_PREFIXES = ("re:", "fw:", "fwd:", "sv:", "答复:", "回复:", "aw:", "wg:", "r:")
 
+# Any run of "RE: FW: AW: ..." reply/forward prefixes, then at most one loose
+# "RE -" / "Fwd " style prefix, stripped in a single anchored match
+_SUBJECT_PREFIX_RE = re.compile(
+    r"^(?:(?:" + "|".join(re.escape(p[:-1]) for p in SUBJECT_PREFIXES) + r"):\s*)*"
+    r"(?:(?:re|fw|fwd)[\s\-:]+)?",
+    re.I,
+)
+
 def clean_subject(subject: str) -> str:
     if not subject:
         return ""
-    s = subject.strip()
-    while True:
-        low = s.lower().lstrip()
-        if any(low.startswith(p) for p in SUBJECT_PREFIXES):
-            colon_ix = low.find(":")
-            s = s[colon_ix + 1:].strip()
-        else:
-            break
-    s = re.sub(r"^(re|fw|fwd)[\s\-\:]+", "", s, flags=re.I).strip()
-    return s
+    return _SUBJECT_PREFIX_RE.sub("", subject.strip(), count=1).strip()
 
 QUOTED_MARKERS = [
     "-----Original Message-----",
@@ -243,40 +368,57 @@ QUOTED_MARKERS = [
     "________________________________",
     "Forwarded message", "Original Appointment",
 ]
+# Leftmost of any marker or a "-----" separator line, found in one scan that
+# stops at the first hit (instead of a full str.find pass per marker)
+_QUOTED_RE = re.compile("|".join(map(re.escape, QUOTED_MARKERS)) + r"|\n-{5,}\n")
 
 def to_et_naive(dt_utc_str: str):
     """Convert Graph ISO UTC string -> Eastern Time (ET), return a *naive* datetime"""
+    if _ET is None:
+        return None
     try:
-        from zoneinfo import ZoneInfo
         dt = datetime.fromisoformat(dt_utc_str.replace("Z", "+00:00"))
-        dt_et = dt.astimezone(ZoneInfo("America/New_York"))
+        dt_et = dt.astimezone(_ET)
         return dt_et.replace(tzinfo=None)
     except Exception:
         return None
 
+def series_to_et_naive(s):
+    """Vectorized to_et_naive for a pandas Series of Graph ISO UTC strings (unparseable -> NaT)"""
+    import pandas as pd
+    dt = pd.to_datetime(s, utc=True, errors="coerce", format="ISO8601")
+    return dt.dt.tz_convert("America/New_York").dt.tz_localize(None)
+
 def trim_to_latest_reply(text: str) -> str:
     if not text:
         return ""
-    cut = len(text)
-    for m in QUOTED_MARKERS:
-        idx = text.find(m)
-        if idx != -1:
-            cut = min(cut, idx)
-    sep = re.search(r"\n-{5,}\n", text)
-    if sep:
-        cut = min(cut, sep.start())
-    return text[:cut].strip()
+    m = _QUOTED_RE.search(text)
+    return (text[:m.start()] if m else text).strip()
 
 def strip_html(html_text: str) -> str:
     if not html_text:
         return ""
-    soup = BeautifulSoup(html_text, "html.parser")
-    text = soup.get_text(" ", strip=True)
-    return re.sub(r"\s+", " ", text).strip()
+    if "<" not in html_text and "&" not in html_text:
+        # No tags and no entities: a parser would hand the text back unchanged
+        return " ".join(html_text.split())
+    if HTMLParser is not None:
+        tree = HTMLParser(html_text)
+        # bs4's get_text skips <style>/<script>; Outlook bodies carry big <style> blocks
+        tree.strip_tags(["style", "script"])
+        text = tree.text(separator=" ", strip=True)
+    else:
+        from bs4 import BeautifulSoup, FeatureNotFound
+        try:
+            soup = BeautifulSoup(html_text, "lxml")  # libxml2, far faster than html.parser
+        except FeatureNotFound:
+            soup = BeautifulSoup(html_text, "html.parser")
+        text = soup.get_text(" ", strip=True)
+    # Same as re.sub(r"\s+", " ", text).strip(): both use str.isspace() whitespace
+    return " ".join(text.split())
 
 def contains_keywords(text: str) -> bool:
     low = text.lower()
-    return any(kw.lower() in low for kw in KEYWORDS)
+    return any(kw in low for kw in _KEYWORDS_LOWER)
 
 def is_noise_email(subject: str, sender: str) -> bool:
     """
@@ -286,16 +428,16 @@ def is_noise_email(subject: str, sender: str) -> bool:
     sender = (sender or "").lower()
 
     # Block specific senders
-    if sender in SENDER_BLOCKLIST:
+    if sender in _SENDER_BLOCKLIST_LOWER:
         return True
 
     # Block specific domains
-    dom = sender.split("@")[-1] if "@" in sender else ""
-    if dom in DOMAIN_BLOCKLIST:
+    _, at, dom = sender.rpartition("@")
+    if at and dom in _DOMAIN_BLOCKLIST_LOWER:
         return True
 
     # Block specific subject phrases (newsletters, training, out of office, etc.)
-    if any(phrase in s for phrase in SUBJECT_BLOCK_PHRASES):
+    if any(phrase in s for phrase in _SUBJECT_PHRASES_LOWER):
         return True
 
     return False
@@ -303,61 +445,86 @@ def is_noise_email(subject: str, sender: str) -> bool:
 
 # [INCLUDE ALL YOUR DATETIME AND ORIGIN EXTRACTION FUNCTIONS]
 _SENT_LABELS = ("Sent:", "Date:", "Enviado:", "Fecha:", "Verzonden:", "Gesendet:")
-_FALLBACK_DTFMTS = [
-    "%A, %B %d, %Y %I:%M %p",
-    "%a, %b %d, %Y %I:%M %p",
-    "%m/%d/%Y %I:%M %p",
-    "%Y-%m-%d %H:%M",
-]
+# The usual Outlook/ISO header formats in one regex, equivalent to trying
+#   "%A, %B %d, %Y %I:%M %p", "%a, %b %d, %Y %I:%M %p", "%m/%d/%Y %I:%M %p", "%Y-%m-%d %H:%M"
+# with strptime (C locale) but without an exception per miss
+_WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_MONTHS = ("January", "February", "March", "April", "May", "June", "July",
+           "August", "September", "October", "November", "December")
+# weekday name -> month-name table of the same style (%A with %B, %a with %b)
+_MONTH_NUMBERS_FOR_WEEKDAY = {
+    **dict.fromkeys((d.lower() for d in _WEEKDAYS), {m.lower(): i for i, m in enumerate(_MONTHS, 1)}),
+    **dict.fromkeys((d[:3].lower() for d in _WEEKDAYS), {m[:3].lower(): i for i, m in enumerate(_MONTHS, 1)}),
+}
+_KNOWN_DT_RE = re.compile(
+    r"(?P<wd>[a-z]+),\s+(?P<mon>[a-z]+)\s+(?P<d>\d{1,2}),\s+(?P<y>\d{4})\s+(?P<h>\d{1,2}):(?P<mi>\d{1,2})\s+(?P<ap>[ap]m)"
+    r"|(?P<mo2>\d{1,2})/(?P<d2>\d{1,2})/(?P<y2>\d{4})\s+(?P<h2>\d{1,2}):(?P<mi2>\d{1,2})\s+(?P<ap2>[ap]m)"
+    r"|(?P<y3>\d{4})-(?P<mo3>\d{1,2})-(?P<d3>\d{1,2})\s+(?P<h3>\d{1,2}):(?P<mi3>\d{1,2})",
+    re.I
+)
 _EMAIL_ANYWHERE = re.compile(r"[A-Z0-9._%+\-]+@[A-Z0-9.\-]+\.[A-Z]{2,}", re.I)
+_UP_TO_AMPM = re.compile(r".*?\b[AP]M\b", re.I)
+_ON_WROTE_RE = re.compile(
+    r"^\s*On\s+(.+?)\s+(?:wrote|escribió):.*?([A-Z0-9._%+\-]+@[A-Z0-9.\-]+\.[A-Z]{2,})",
+    re.I | re.M
+)
+
+def _parse_known_dt(s: str):
+    """Naive datetime if `s` is exactly one of the usual Outlook/ISO header formats, else None.
+    Much cheaper than dateutil's tokenizer, which stays as the fallback."""
+    m = _KNOWN_DT_RE.fullmatch(s)
+    if m is None:
+        return None
+    g = m.groupdict()
+    if g["y"]:
+        month = _MONTH_NUMBERS_FOR_WEEKDAY.get(g["wd"].lower(), {}).get(g["mon"].lower())
+        if month is None:
+            return None
+        y, mo, d, h, mi, ap = g["y"], month, g["d"], g["h"], g["mi"], g["ap"]
+    elif g["y2"]:
+        y, mo, d, h, mi, ap = g["y2"], g["mo2"], g["d2"], g["h2"], g["mi2"], g["ap2"]
+    else:
+        y, mo, d, h, mi, ap = g["y3"], g["mo3"], g["d3"], g["h3"], g["mi3"], None
+    h = int(h)
+    if ap:
+        if not 1 <= h <= 12:
+            return None
+        h = h % 12 + (12 if ap.lower() == "pm" else 0)
+    try:
+        return datetime(int(y), int(mo), int(d), h, int(mi))
+    except ValueError:
+        return None
 
 def _parse_human_datetime_to_utc_iso(s: str) -> str:
     if not s:
         return ""
     s = s.strip()
-    try:
-        from dateutil import parser
-        from zoneinfo import ZoneInfo
-        dt = parser.parse(s)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=ZoneInfo("America/New_York"))
-        return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-    except Exception:
-        pass
-    try:
-        from zoneinfo import ZoneInfo
-    except Exception:
-        ZoneInfo = None
-    for fmt in _FALLBACK_DTFMTS:
+    dt = _parse_known_dt(s)
+    if dt is None:
         try:
-            dt = datetime.strptime(s, fmt)
-            if ZoneInfo:
-                dt = dt.replace(tzinfo=ZoneInfo("America/New_York"))
-            else:
-                dt = dt.replace(tzinfo=timezone.utc)
-            return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+            dt = dt_parse(s)
         except Exception:
-            continue
-    return ""
+            return ""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_ET or timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
+@functools.lru_cache(maxsize=16384)
 def _iso_to_dt(s: str):
+    # The same timestamps (a thread's origin, the helper's pick, rdt) are compared
+    # over and over across a sync; datetimes are immutable, so sharing them is safe
     try:
         return datetime.fromisoformat(s.replace("Z", "+00:00"))
     except Exception:
         return None
 
 def _min_iso(*values: str) -> str:
-    best = None
-    for v in values:
-        if not v:
-            continue
-        dv = _iso_to_dt(v)
-        if dv is None:
-            continue
-        if best is None or dv < best:
-            best = dv
+    best = min((dv for dv in map(_iso_to_dt, filter(None, values)) if dv is not None), default=None)
     return best.astimezone(timezone.utc).isoformat().replace("+00:00", "Z") if best else ""
 
+_FROM_LINE_RE = re.compile(r"\bFrom:\s*(.*)", re.I)
+_SENT_LABELS_LOWER = tuple(lbl.lower() for lbl in _SENT_LABELS)
+
 def extract_origins_deep(full_body_plain: str):
     if not full_body_plain:
         return "", ""
@@ -365,7 +532,7 @@ def extract_origins_deep(full_body_plain: str):
     candidates = []
     for i, line in enumerate(lines):
         if "From:" in line:
-            m_from = re.search(r"\bFrom:\s*(.*)", line, flags=re.I)
+            m_from = _FROM_LINE_RE.search(line)
             if not m_from:
                 continue
             emails = _EMAIL_ANYWHERE.findall(line)
@@ -374,16 +541,13 @@ def extract_origins_deep(full_body_plain: str):
                 continue
             for j in range(i + 1, min(i + 10, len(lines))):
                 l2 = lines[j]
-                if any(l2.strip().lower().startswith(lbl.lower()) for lbl in _SENT_LABELS):
+                if l2.strip().lower().startswith(_SENT_LABELS_LOWER):
                     sent_text = l2.split(":", 1)[1] if ":" in l2 else l2
                     iso = _parse_human_datetime_to_utc_iso(sent_text)
                     if iso:
                         candidates.append((email, iso))
                         break
-    inline = re.findall(
-        r"^\s*On\s+(.+?)\s+(?:wrote|escribió):.*?([A-Z0-9._%+\-]+@[A-Z0-9.\-]+\.[A-Z]{2,})",
-        full_body_plain, flags=re.I | re.M
-    )
+    inline = _ON_WROTE_RE.findall(full_body_plain)
     for date_part, email in inline:
         iso = _parse_human_datetime_to_utc_iso(date_part)
         if iso:
@@ -393,18 +557,21 @@ def extract_origins_deep(full_body_plain: str):
     email, iso = min(candidates, key=lambda t: _iso_to_dt(t[1]) or datetime.max)
     return email, iso
 
+# ISO, US numeric and "Month D, YYYY" dates in one scan; only the US form is
+# case-insensitive, as before. "On ... wrote:" stays a separate pass because
+# its match contains the dates the other alternatives would pick up.
+_ANY_DATE_RE = re.compile(
+    r"\b\d{4}-\d{1,2}-\d{1,2}(?:[ T]\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AP]M)?)?\b"
+    r"|(?i:\b\d{1,2}/\d{1,2}/\d{2,4}(?:\s+\d{1,2}:\d{2}(?::\d{2})?\s?(?:AM|PM)?)?\b)"
+    r"|\b[A-Z][a-z]+\s+\d{1,2},\s+\d{4}(?:\s+\d{1,2}:\d{2}(?::\d{2})?\s?(?:AM|PM)?)?\b"
+)
+_ON_WROTE_DATE_RE = re.compile(r"\bOn\s+(.+?)\s+(?:wrote|escribió):", re.I)
+
 def extract_earliest_datetime_anywhere(text: str) -> str:
     if not text:
         return ""
-    candidates = set()
-    for m in re.finditer(r"\b\d{4}-\d{1,2}-\d{1,2}(?:[ T]\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AP]M)?)?\b", text):
-        candidates.add(m.group(0))
-    for m in re.finditer(r"\b\d{1,2}/\d{1,2}/\d{2,4}(?:\s+\d{1,2}:\d{2}(?::\d{2})?\s?(?:AM|PM)?)?\b", text, flags=re.I):
-        candidates.add(m.group(0))
-    for m in re.finditer(r"\b([A-Z][a-z]+)\s+\d{1,2},\s+\d{4}(?:\s+\d{1,2}:\d{2}(?::\d{2})?\s?(?:AM|PM)?)?\b", text):
-        candidates.add(m.group(0))
-    for m in re.finditer(r"\bOn\s+(.+?)\s+(?:wrote|escribió):", text, flags=re.I):
-        candidates.add(m.group(1))
+    candidates = {m.group(0) for m in _ANY_DATE_RE.finditer(text)}
+    candidates.update(m.group(1) for m in _ON_WROTE_DATE_RE.finditer(text))
     if not candidates:
         return ""
     iso_values = []
@@ -419,18 +586,21 @@ def extract_earliest_datetime_anywhere(text: str) -> str:
 def _to_utc_iso_from_sent(s: str) -> str:
     return _parse_human_datetime_to_utc_iso(s)
 
+_FROM_ANGLE_EMAIL_RE = re.compile(r"\s*From:\s.*?<([^>\s@]+@[^>]+)>", re.I)
+_SENT_LINE_RE = re.compile(r"\s*Sent:\s*(.*)$", re.I)
+
 def extract_origin_from_history(full_body_plain: str):
     if not full_body_plain:
         return "", ""
     lines = full_body_plain.splitlines()
     origin_email, origin_sent_iso = "", ""
     for i, line in enumerate(lines):
-        m_from = re.match(r"\s*From:\s.*?<([^>\s@]+@[^>]+)>", line, flags=re.I)
+        m_from = _FROM_ANGLE_EMAIL_RE.match(line)
         if not m_from:
             continue
         candidate_email = m_from.group(1).strip()
         for j in range(i + 1, min(i + 9, len(lines))):
-            m_sent = re.match(r"\s*Sent:\s*(.*)$", lines[j], flags=re.I)
+            m_sent = _SENT_LINE_RE.match(lines[j])
             if m_sent:
                 candidate_sent = m_sent.group(1).strip()
                 candidate_iso = _to_utc_iso_from_sent(candidate_sent)
@@ -451,17 +621,25 @@ CASE_ID_PATTERNS = [
     (r'\bSO\s*(?:#|No\.?|Number)?\s*[:\-]?\s*([0-9]{5,})', 'so'),
 ]
 
+_INITIATOR_RE = re.compile(
+    r"From:\s*(.+?)<\s*([\w\.-]+@[\w\.-]+)\s*>.*?Sent:\s*([A-Za-z0-9,:\s\-]+(?:AM|PM)?)",
+    re.IGNORECASE
+)
+_CASE_ID_RES = [(re.compile(pat, re.I), tag) for pat, tag in CASE_ID_PATTERNS]
+
 def compute_first_seen_initiator(conversation_id, full_body_plain, fallback_sender, mailbox):
-    pattern = re.compile(
-        r"From:\s*(.+?)<\s*([\w\.-]+@[\w\.-]+)\s*>.*?Sent:\s*([A-Za-z0-9,:\s\-]+(?:AM|PM)?)",
-        re.IGNORECASE
-    )
-    matches = pattern.findall(full_body_plain)
+    matches = _INITIATOR_RE.findall(full_body_plain)
     earliest_dt = None
     initiator_email = None
     for _, email, sent_raw in matches:
         try:
-            sent_dt = dt_parse(sent_raw.strip(), fuzzy=True)
+            # The capture often runs on past the time ("... 10:03 AM To: ..."), so try
+            # the known formats on the part up to AM/PM before fuzzy dateutil
+            sent_raw = sent_raw.strip()
+            head = _UP_TO_AMPM.match(sent_raw)
+            sent_dt = _parse_known_dt(head.group(0) if head else sent_raw)
+            if sent_dt is None:
+                sent_dt = dt_parse(sent_raw, fuzzy=True)
             if sent_dt.tzinfo is None:
                 sent_dt = sent_dt.replace(tzinfo=tzutc())
             else:
@@ -476,18 +654,21 @@ def compute_first_seen_initiator(conversation_id, full_body_plain, fallback_send
 
 def extract_external_id(text: str) -> str:
     t = text or ""
-    for pat, tag in CASE_ID_PATTERNS:
-        m = re.search(pat, t, flags=re.I)
+    for rx, tag in _CASE_ID_RES:
+        m = rx.search(t)
         if m:
             raw = m.group(1)
             norm = raw.replace(" ", "").replace("/", "-")
             return f"{tag}-{norm.lower()}"
     return ""
 
+_CASE_KEY_DISALLOWED_RE = re.compile(r"[^a-z0-9\-_\/]")
+_NON_ALNUM_RUN_RE = re.compile(r"[^a-z0-9]+")
+
 def normalize_case_key(raw: str) -> str:
     if not raw:
         return ""
-    s = re.sub(r'[^a-z0-9\-_\/]','', raw.lower())
+    s = _CASE_KEY_DISALLOWED_RE.sub("", raw.lower())
     return s[:80]
 
 def canonical_case_key(domain: str, pn_norm: str, subject: str, text_for_ids: str) -> str:
@@ -498,76 +679,121 @@ def canonical_case_key(domain: str, pn_norm: str, subject: str, text_for_ids: st
     elif ext:
         key = f"{dom}-{ext}"
     else:
-        subj = re.sub(r'[^a-z0-9]+', '-', (subject or '').lower()).strip('-')[:30]
+        subj = _NON_ALNUM_RUN_RE.sub("-", (subject or "").lower()).strip("-")[:30]
         key = f"{dom}-{subj or 'no-subject'}"
     return normalize_case_key(key)
 
 def to_et(dt_utc_str: str) -> str:
-    try:
-        from zoneinfo import ZoneInfo
-        et = ZoneInfo("America/New_York")
-    except Exception:
-        et = None
     try:
         dt = datetime.fromisoformat(dt_utc_str.replace("Z", "+00:00"))
-        if et:
-            dt = dt.astimezone(et)
-        else:
-            dt = dt.astimezone(timezone.utc)
+        dt = dt.astimezone(_ET or timezone.utc)
     except Exception:
         return dt_utc_str
-    return dt.strftime("%-I:%M %p %m/%d/%Y") if os.name != "nt" else dt.strftime("%#I:%M %p %m/%d/%Y")
+    return dt.strftime(_ET_FMT)
 
 # [DATABASE FUNCTIONS]
-def touch_conversation(conversation_id: str, received_utc: str):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("UPDATE complaints SET received_utc=? WHERE conversation_id=?", (received_utc, conversation_id))
-    con.commit()
-    con.close()
-
-def get_by_conversation_id(conv_id: str):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
-        SELECT conversation_id, received_utc, part_number
-        FROM complaints
-        WHERE conversation_id=?
-    """, (conv_id,))
-    row = cur.fetchone()
-    con.close()
-    return row
-
-def get_by_case_key(case_key: str):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
-        SELECT conversation_id, received_utc, part_number
-        FROM complaints
-        WHERE case_key=?
-        ORDER BY received_utc DESC
-        LIMIT 1
-    """, (case_key,))
-    row = cur.fetchone()
-    con.close()
-    return row
+# Per-connection tuning (journal_mode=WAL is stored in the file, set by init_db):
+# with WAL, synchronous=NORMAL only fsyncs at checkpoints; temp b-trees stay in
+# RAM; 64 MB page cache; reads go through a 256 MB memory map.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL;"
+    "PRAGMA temp_store=MEMORY;"
+    "PRAGMA cache_size=-65536;"
+    "PRAGMA mmap_size=268435456;"
+)
+
+def connect_db(**kwargs) -> sqlite3.Connection:
+    """sqlite3.connect(DB_PATH, **kwargs) with the pragmas above applied"""
+    con = sqlite3.connect(DB_PATH, **kwargs)
+    con.executescript(_CONNECTION_PRAGMAS)
+    return con
+
+@contextmanager
+def _db(con=None):
+    """Yield `con` if given (caller owns the transaction), else a fresh connection committed on exit"""
+    if con is not None:
+        yield con
+        return
+    con = connect_db()
+    try:
+        yield con
+        con.commit()
+    finally:
+        con.close()
 
-def ensure_columns():
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("PRAGMA table_info(complaints)")
-    cols = {row[1] for row in cur.fetchall()}
-    if "first_seen_utc" not in cols:
-        cur.execute("ALTER TABLE complaints ADD COLUMN first_seen_utc TEXT")
-    if "initiator_email" not in cols:
-        cur.execute("ALTER TABLE complaints ADD COLUMN initiator_email TEXT")
-    con.commit()
-    con.close()
+def touch_conversation(conversation_id: str, received_utc: str, con=None):
+    with _db(con) as c:
+        c.execute("UPDATE complaints SET received_utc=? WHERE conversation_id=?", (received_utc, conversation_id))
+
+def get_by_conversation_id(conv_id: str, con=None):
+    with _db(con) as c:
+        return c.execute("""
+            SELECT conversation_id, received_utc, part_number
+            FROM complaints
+            WHERE conversation_id=?
+        """, (conv_id,)).fetchone()
+
+def get_by_case_key(case_key: str, con=None):
+    with _db(con) as c:
+        return c.execute("""
+            SELECT conversation_id, received_utc, part_number
+            FROM complaints
+            WHERE case_key=?
+            ORDER BY received_utc DESC
+            LIMIT 1
+        """, (case_key,)).fetchone()
+
+class ComplaintIndex:
+    """In-memory (conversation_id, received_utc, part_number, case_key) of every complaint.
+
+    Answers get_by_conversation_id / get_by_case_key for the sync loop without a
+    query per conversation. process() mirrors each of its writes with put().
+    """
 
-def update_row_for_conversation(target_conv_id: str, row: dict):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
+    def __init__(self, con=None):
+        self._rows = {}
+        self._cases = {}  # case_key -> {conversation_id, ...}
+        with _db(con) as c:
+            for conv_id, received_utc, part_number, case_key in c.execute(
+                    "SELECT conversation_id, received_utc, part_number, case_key FROM complaints"):
+                self.put(conv_id, received_utc, part_number, case_key)
+
+    def put(self, conv_id: str, received_utc: str, part_number: str, case_key: str):
+        old = self._rows.get(conv_id)
+        if old is not None and old[3] != case_key:
+            self._cases.get(old[3], set()).discard(conv_id)
+        self._rows[conv_id] = (conv_id, received_utc, part_number, case_key)
+        if case_key is not None:
+            self._cases.setdefault(case_key, set()).add(conv_id)
+
+    def touch(self, conv_id: str, received_utc: str):
+        conv_id, _, part_number, case_key = self._rows[conv_id]
+        self._rows[conv_id] = (conv_id, received_utc, part_number, case_key)
+
+    def by_conversation(self, conv_id: str):
+        """Same row as get_by_conversation_id"""
+        row = self._rows.get(conv_id)
+        return row[:3] if row else None
+
+    def by_case(self, case_key: str):
+        """Same row as get_by_case_key (latest received_utc wins)"""
+        members = self._cases.get(case_key)
+        if not members:
+            return None
+        latest = max(members, key=lambda conv_id: self._rows[conv_id][1] or "")
+        return self._rows[latest][:3]
+
+def ensure_columns(con=None):
+    with _db(con) as c:
+        cols = {row[1] for row in c.execute("PRAGMA table_info(complaints)")}
+        if "first_seen_utc" not in cols:
+            c.execute("ALTER TABLE complaints ADD COLUMN first_seen_utc TEXT")
+        if "initiator_email" not in cols:
+            c.execute("ALTER TABLE complaints ADD COLUMN initiator_email TEXT")
+
+def update_row_for_conversation(target_conv_id: str, row: dict, con=None):
+    with _db(con) as c:
+        c.execute("""
         UPDATE complaints SET
             received_utc = :received_utc,
             from_email = :from_email,
@@ -578,16 +804,10 @@ def update_row_for_conversation(target_conv_id: str, row: dict):
             summary = :summary,
             case_key = :case_key,
             thread_url = :thread_url,
-            first_seen_utc = CASE
-                WHEN first_seen_utc IS NULL THEN :first_seen_utc
-                WHEN :first_seen_utc IS NOT NULL AND :first_seen_utc < first_seen_utc THEN :first_seen_utc
-                ELSE first_seen_utc
-            END,
+            first_seen_utc = MIN(IFNULL(first_seen_utc, :first_seen_utc), IFNULL(:first_seen_utc, first_seen_utc)),
             initiator_email = COALESCE(initiator_email, :initiator_email)
         WHERE conversation_id = :target_conv_id
     """, {**row, "target_conv_id": target_conv_id})
-    con.commit()
-    con.close()
 
 # [PART NUMBER EXTRACTION]
 PN_PATTERNS = [
@@ -595,6 +815,7 @@ PN_PATTERNS = [
     r'\b(Part|Item|SKU)\s*(?:No\.?|Number|#)?\s*[:\-]?\s*([A-Za-z0-9\-_\.\/]{5,25})',
     r'\bPN#?\s*[:\-]?\s*([A-Za-z0-9\-_\.\/]{5,25})',
 ]
+_PN_RES = [re.compile(pat, re.I) for pat in PN_PATTERNS]
 
 STOPWORDS = {
     "or","and","ok","re","fw","bs","hn","hi","thanks","regards",
@@ -603,11 +824,15 @@ STOPWORDS = {
 
 PN_ALLOWED = re.compile(r'^[A-Za-z0-9\-_\.\/]{5,25}$')
 
+# PN_ALLOWED is ASCII-only, so these set checks (C-level scans) are exact for PN tokens
+_DIGITS = frozenset("0123456789")
+_LETTERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+
 def _has_digit(s: str) -> bool:
-    return any(ch.isdigit() for ch in s)
+    return not _DIGITS.isdisjoint(s)
 
 def _has_letter(s: str) -> bool:
-    return any(ch.isalpha() for ch in s)
+    return not _LETTERS.isdisjoint(s)
 
 def is_valid_pn_basic(token: str) -> bool:
     if not token or token.lower() in STOPWORDS:
@@ -616,38 +841,51 @@ def is_valid_pn_basic(token: str) -> bool:
         return False
     return _has_digit(token) and _has_letter(token)
 
+# Everything a PN may not contain (whitespace included, so no separate strip)
+_PN_DISALLOWED_RE = re.compile(r"[^A-Z0-9\-\_\.\/]")
+_NON_ALNUM_RE = re.compile(r"[^A-Z0-9]")
+
 def normalize_pn(s: str) -> str:
     if not s:
         return ""
-    s = s.upper().strip()
-    s = s.replace(" ", "")
-    return re.sub(r"[^A-Z0-9\-\_\.\/]", "", s)
+    return _PN_DISALLOWED_RE.sub("", s.upper())
 
 def _alnum(s: str) -> str:
-    return re.sub(r'[^A-Z0-9]', '', (s or '').upper())
+    return _NON_ALNUM_RE.sub("", (s or "").upper())
 
 def extract_pn_candidates(subject: str, latest_reply: str):
     hay = "  ".join([(subject or ""), (latest_reply or "")])
-    master_hit = None
+    # Every valid PN has a digit: without one anywhere, none of the patterns can hit
+    if not _has_digit(hay):
+        return None, None, hay, _alnum(hay)
     fallback = None
-    hits = []
-    for pat in PN_PATTERNS:
-        for m in re.finditer(pat, hay, flags=re.I):
+    for rx in _PN_RES:
+        for m in rx.finditer(hay):
             g = m.group(2) if m.lastindex and m.lastindex >= 2 else m.group(1)
             token = (g or "").strip().strip('.,;:)]}')
-            if token and is_valid_pn_basic(token):
-                hits.append((token, normalize_pn(token)))
-    for token, norm in hits:
-        if PN_MASTER_SET and norm in PN_MASTER_SET:
-            master_hit = master_hit or token
-        else:
+            if not token or not is_valid_pn_basic(token):
+                continue
+            # The first master hit wins outright; callers ignore the fallback then
+            if PN_MASTER_SET and normalize_pn(token) in PN_MASTER_SET:
+                return token, None, hay, _alnum(hay)
             fallback = fallback or token
-    return master_hit, fallback, hay, _alnum(hay)
+    return None, fallback, hay, _alnum(hay)
 
-def load_master_pns(path: str) -> set:
+def load_master_pns(path: str) -> frozenset:
     if not os.path.exists(path):
         print(f"[WARN] PN master file not found at {path}")
-        return set()
+        return frozenset()
+    # Normalized PNs, one per line, reused until the master file is modified
+    cache_path = path + ".pns"
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            with open(cache_path, encoding="utf-8") as f:
+                pnset = frozenset(f.read().split("\n")) - {""}
+            print(f"[INFO] Loaded {len(pnset)} master PNs from {cache_path}")
+            return pnset
+    except OSError:
+        pass
+    import pandas as pd
     try:
         if path.lower().endswith((".xlsx", ".xls")):
             df = pd.read_excel(path, engine="openpyxl")
@@ -657,23 +895,30 @@ def load_master_pns(path: str) -> set:
             df = pd.read_excel(path, engine="openpyxl")
     except Exception as e:
         print(f"[WARN] Failed to load PN master file: {e}")
-        return set()
+        return frozenset()
     cols = [c for c in df.columns if str(c).strip().lower() in {"partnumber", "pn", "part", "item", "sku"}]
     col = cols[0] if cols else df.columns[0]
-    values = (
-        df[col].astype(str).map(normalize_pn).dropna().map(str.strip)
-        .replace("", pd.NA).dropna().unique().tolist()
-    )
-    pnset = set(values)
+    # Vectorized normalize_pn over the whole column; "string" keeps empty cells as <NA>
+    # (astype(str) turned them into a bogus "NAN" part number)
+    values = df[col].astype("string").dropna().str.upper().str.replace(_PN_DISALLOWED_RE, "", regex=True)
+    pnset = frozenset(values.unique()) - {""}
     print(f"[INFO] Loaded {len(pnset)} master PNs from {path}")
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(sorted(pnset)))
+    except OSError as e:
+        print(f"[WARN] Could not write PN cache {cache_path}: {e}")
     return pnset
 
 PN_MASTER_SET = load_master_pns(PN_MASTER_PATH)
 
 # [DATABASE INIT AND UPSERT]
+GEMINI_CACHE_TTL_S = 30 * 24 * 3600  # cache entries older than this are purged by purge_expired_caches
 def init_db():
-    con = sqlite3.connect(DB_PATH)
+    con = connect_db()
     cur = con.cursor()
+    # Readers (dashboards) and the sync writer don't block each other
+    cur.execute("PRAGMA journal_mode=WAL")
     cur.execute("""
         CREATE TABLE IF NOT EXISTS complaints (
             conversation_id TEXT PRIMARY KEY,
@@ -702,36 +947,58 @@ def init_db():
             value TEXT
         )
     """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS gemini_cache (
+            hash BLOB PRIMARY KEY,
+            response TEXT,
+            ts INTEGER
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS noise_hashes (
+            hash BLOB PRIMARY KEY,
+            hits INTEGER,
+            ts INTEGER
+        )
+    """)
+    # get_by_case_key: WHERE case_key=? ORDER BY received_utc DESC LIMIT 1 as one index seek
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_cx_case_received ON complaints(case_key, received_utc DESC)")
+    ensure_columns(con)
     con.commit()
     con.close()
-    ensure_columns()
 
 
-def get_db_setting(key: str, default: str = "") -> str:
+def purge_expired_caches(con=None):
+    """Drop sync cache rows older than GEMINI_CACHE_TTL_S and commit.
+
+    Once per sync, not in init_db: a DELETE takes the write lock even when it
+    matches nothing, and init_db runs on every dashboard refresh.
+    """
+    cutoff = int(time.time()) - GEMINI_CACHE_TTL_S
+    with _db(con) as c:
+        # Old answers are dropped so the caches only cover mail a re-sync can still see
+        c.execute("DELETE FROM gemini_cache WHERE ts < ?", (cutoff,))
+        c.execute("DELETE FROM noise_hashes WHERE ts < ?", (cutoff,))
+        c.commit()
+
+def get_db_setting(key: str, default: str = "", con=None) -> str:
     """Read a setting from the database settings table."""
     try:
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        cur.execute("SELECT value FROM settings WHERE key=?", (key,))
-        row = cur.fetchone()
-        con.close()
+        with _db(con) as c:
+            row = c.execute("SELECT value FROM settings WHERE key=?", (key,)).fetchone()
         return row[0] if row else default
     except Exception:
         return default
 
 
-def set_db_setting(key: str, value: str):
+def set_db_setting(key: str, value: str, con=None):
     """Write a setting to the database settings table."""
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
-    con.commit()
-    con.close()
+    with _db(con) as c:
+        c.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
 
-def upsert_row(row: dict):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
+def upsert_row(row: dict, con=None):
+    with _db(con) as c:
+        c.execute("""
         INSERT INTO complaints (
             conversation_id, received_utc, from_email, subject, jo_number, part_number,
             category, summary, case_key, thread_url, first_seen_utc, initiator_email
@@ -750,21 +1017,41 @@ def upsert_row(row: dict):
             summary      = excluded.summary,
             case_key     = excluded.case_key,
             thread_url   = excluded.thread_url,
-            first_seen_utc = CASE
-                WHEN complaints.first_seen_utc IS NULL THEN excluded.first_seen_utc
-                WHEN excluded.first_seen_utc IS NOT NULL AND excluded.first_seen_utc < complaints.first_seen_utc THEN excluded.first_seen_utc
-                ELSE complaints.first_seen_utc
-            END,
+            first_seen_utc = MIN(IFNULL(complaints.first_seen_utc, excluded.first_seen_utc),
+                                 IFNULL(excluded.first_seen_utc, complaints.first_seen_utc)),
             initiator_email = COALESCE(complaints.initiator_email, excluded.initiator_email)
     """, row)
-    con.commit()
-    con.close()
 
-def fetch_all_rows():
-    con = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM complaints", con)
-    con.close()
-    return df
+def fetch_all_rows(con=None):
+    import pandas as pd
+    # SELECT * on purpose: user-added custom columns ride along for the exports.
+    # A plain cursor + DataFrame skips read_sql_query's per-row dispatch.
+    with _db(con) as c:
+        cur = c.execute("SELECT * FROM complaints")
+        cols = [d[0] for d in cur.description]
+        return pd.DataFrame.from_records(cur.fetchall(), columns=cols)
+
+def fetch_latest_per_case(con=None):
+    """fetch_all_rows() reduced to each case_key's latest row (by received_utc), in SQL.
+
+    Same pick as sort_values("received_utc") + keep-last per case: rows without a
+    received_utc sort last and so win, and NULL case_keys form one group. The
+    (case_key, received_utc) index serves the window's ordering.
+    """
+    import pandas as pd
+    with _db(con) as c:
+        cur = c.execute("""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY case_key
+                    ORDER BY received_utc IS NULL DESC, received_utc DESC, rowid DESC
+                ) AS _case_rank
+                FROM complaints
+            ) WHERE _case_rank = 1
+        """)
+        cols = [d[0] for d in cur.description]
+        df = pd.DataFrame.from_records(cur.fetchall(), columns=cols)
+    return df.drop(columns="_case_rank")
 
 def _safe_write_excel(write_fn, target_path: str, retries: int = 3, sleep_s: float = 1.2):
     target_dir = os.path.dirname(os.path.abspath(target_path))
@@ -796,18 +1083,123 @@ def _safe_write_excel(write_fn, target_path: str, retries: int = 3, sleep_s: flo
     print(f"[OK] Excel written (fallback): {fallback_path}")
     return fallback_path
 
+EXCEL_COLUMN_WIDTHS = {
+    "Date (ET)": 12,
+    "Initiated By": 30,
+    "P/N": 26,
+    "Summary": 64,
+    "Category": 18, "Category_Final": 18,
+    "Subject": 44,
+    "Notes": 30,
+    "Link": 10,
+}
+
+def write_complaints_workbook(df_out, target):
+    """Write df_out as the formatted "Complaints" sheet to a path or binary file object.
+
+    Uses xlsxwriter when it is installed (formats are set once per column), else
+    openpyxl through pandas.
+    """
+    try:
+        import xlsxwriter
+    except ImportError:
+        return _write_complaints_openpyxl(df_out, target)
+    # Rows are streamed straight to disk (constant_memory; ignored for file objects).
+    # pandas' to_excel writes column by column, which constant_memory can't take,
+    # so the rows are written here directly.
+    wb = xlsxwriter.Workbook(target, {
+        "constant_memory": True,
+        "strings_to_urls": False,
+        "default_date_format": "mm/dd/yyyy",
+    })
+    try:
+        ws = wb.add_worksheet("Complaints")
+        bold = wb.add_format({"bold": True})
+        wrap = wb.add_format({"text_wrap": True, "valign": "top"})
+        cols = list(df_out.columns)
+        ws.add_table(0, 0, len(df_out), len(cols) - 1, {
+            "name": "ComplaintTable",
+            "style": "Table Style Medium 9",
+            "columns": [{"header": str(c), "header_format": bold} for c in cols],
+        })
+        ws.freeze_panes(1, 0)
+        for idx, name in enumerate(cols):
+            ws.set_column(idx, idx, EXCEL_COLUMN_WIDTHS.get(name, 24), wrap if name == "Summary" else None)
+        values = df_out.astype(object).where(df_out.notna(), None)
+        for r, row in enumerate(values.itertuples(index=False, name=None), start=1):
+            ws.write_row(r, 0, row)
+    finally:
+        wb.close()
+
+def _write_complaints_openpyxl(df_out, target):
+    import pandas as pd
+    from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.table import Table, TableStyleInfo
+    from openpyxl.styles import Alignment, Font
+    with pd.ExcelWriter(target, engine="openpyxl") as writer:
+        sheet = "Complaints"
+        df_out.to_excel(writer, sheet_name=sheet, index=False)
+        wb = writer.book
+        ws = wb[sheet]
+        ws.freeze_panes = "A2"
+        last_col = get_column_letter(ws.max_column)
+        last_row = ws.max_row
+        tbl = Table(displayName="ComplaintTable", ref=f"A1:{last_col}{last_row}")
+        tbl.tableStyleInfo = TableStyleInfo(
+            name="TableStyleMedium9",
+            showFirstColumn=False, showLastColumn=False,
+            showRowStripes=True, showColumnStripes=False
+        )
+        ws.add_table(tbl)
+        # openpyxl keeps formats per cell (column styles only reach empty cells), so
+        # walk each styled column once and share one style object across its cells
+        if "Summary" in df_out.columns:
+            cidx = df_out.columns.get_loc("Summary") + 1
+            wrap = Alignment(wrap_text=True, vertical="top")
+            for (cell,) in ws.iter_rows(min_row=2, min_col=cidx, max_col=cidx):
+                cell.alignment = wrap
+        if "Date (ET)" in df_out.columns:
+            didx = df_out.columns.get_loc("Date (ET)") + 1
+            for (cell,) in ws.iter_rows(min_row=2, min_col=didx, max_col=didx):
+                cell.number_format = "mm/dd/yyyy"
+        bold = Font(bold=True)
+        for cell in ws[1]:
+            cell.font = bold
+        for idx, name in enumerate(df_out.columns, start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = EXCEL_COLUMN_WIDTHS.get(name, 24)
+
+_EXCEL_EXPORT_LOCK = threading.Lock()  # one writer at a time (sync export vs. Save button)
+
 def export_to_excel():
-    df = fetch_all_rows()
+    with _EXCEL_EXPORT_LOCK:
+        _export_to_excel()
+
+def export_to_excel_in_background() -> threading.Thread:
+    """Start export_to_excel on its own thread and return it.
+
+    Not a daemon: a headless run (sync_and_push.bat) still finishes the file
+    before the interpreter exits and push_db.py runs.
+    """
+    def run():
+        try:
+            export_to_excel()
+        except Exception as e:
+            print(f"[ERROR] Excel export failed: {e}")
+    thread = threading.Thread(target=run, name="excel-export")
+    thread.start()
+    return thread
+
+def _export_to_excel():
+    import pandas as pd
+    df = fetch_latest_per_case()
     if df.empty:
         print("[INFO] No rows to export.")
         return
-    if "case_key" in df.columns and "received_utc" in df.columns:
-        df = df.sort_values("received_utc").drop_duplicates(subset=["case_key"], keep="last")
-    def _to_et_naive_wrapper(x):
-        return to_et_naive(x) if pd.notna(x) and str(x).strip() else None
-    df["__first_et"] = df["first_seen_utc"].apply(_to_et_naive_wrapper)
-    df["Date (ET)"] = df["__first_et"]
-    df = df.sort_values("__first_et", ascending=False, na_position="last")
+    # Sort just the date column, then reorder the (wide) frame once by its index
+    first_et = series_to_et_naive(df["first_seen_utc"])
+    order = first_et.sort_values(ascending=False, na_position="last").index
+    df = df.loc[order]
+    df["Date (ET)"] = first_et
     colmap = {
         "initiator_email": "Initiated By",
         "part_number": "P/N",
@@ -829,7 +1221,7 @@ def export_to_excel():
             df_out.insert(df_out.columns.get_loc("Subject") + 1, "Notes", "")
         else:
             df_out["Notes"] = ""
-    con = sqlite3.connect(DB_PATH)
+    con = connect_db()
     cur = con.cursor()
     cur.execute("SELECT column_name FROM custom_columns")
     custom_cols = [row[0] for row in cur.fetchall()]
@@ -838,10 +1230,10 @@ def export_to_excel():
         if col in df.columns and col not in df_out.columns:
             df_out[col] = df[col]
     if "Link" in df_out.columns:
-        df_out["_url"] = df_out["Link"].copy()
-        df_out["Link"] = df_out["_url"].apply(
-            lambda u: f'=HYPERLINK("{str(u).strip()}", "Open")' if pd.notna(u) and str(u).strip() else ""
-        )
+        url = df_out["Link"].fillna("").astype(str).str.strip()
+        has_url = url != ""
+        df_out["Link"] = ""
+        df_out.loc[has_url, "Link"] = '=HYPERLINK("' + url[has_url] + '", "Open")'
     desired = [
         "Date (ET)",
         "Initiated By",
@@ -853,74 +1245,47 @@ def export_to_excel():
         "Link",
     ] + custom_cols
     existing = [c for c in desired if c in df_out.columns]
-    if "_url" in df_out.columns:
-        df_out = df_out.drop(columns=["_url"])
     df_out = df_out[existing]
-    def _write(path):
-        with pd.ExcelWriter(path, engine="openpyxl") as writer:
-            sheet = "Complaints"
-            df_out.to_excel(writer, sheet_name=sheet, index=False)
-            from openpyxl.utils import get_column_letter
-            from openpyxl.worksheet.table import Table, TableStyleInfo
-            from openpyxl.styles import Alignment, Font
-            wb = writer.book
-            ws = wb[sheet]
-            ws.freeze_panes = "A2"
-            last_col = get_column_letter(ws.max_column)
-            last_row = ws.max_row
-            tbl = Table(displayName="ComplaintTable", ref=f"A1:{last_col}{last_row}")
-            tbl.tableStyleInfo = TableStyleInfo(
-                name="TableStyleMedium9",
-                showFirstColumn=False, showLastColumn=False,
-                showRowStripes=True, showColumnStripes=False
-            )
-            ws.add_table(tbl)
-            if "Summary" in df_out.columns:
-                cidx = df_out.columns.get_loc("Summary") + 1
-                for r in range(2, ws.max_row + 1):
-                    ws.cell(row=r, column=cidx).alignment = Alignment(wrap_text=True, vertical="top")
-            if "Date (ET)" in df_out.columns:
-                didx = df_out.columns.get_loc("Date (ET)") + 1
-                for r in range(2, ws.max_row + 1):
-                    ws.cell(row=r, column=didx).number_format = "mm/dd/yyyy"
-            for c in range(1, ws.max_column + 1):
-                ws.cell(row=1, column=c).font = Font(bold=True)
-            target_widths = {
-                "Date (ET)": 12,
-                "Initiated By": 30,
-                "P/N": 26,
-                "Summary": 64,
-                "Category": 18, "Category_Final": 18,
-                "Subject": 44,
-                "Notes": 30,
-                "Link": 10,
-            }
-            for idx, name in enumerate(df_out.columns, start=1):
-                ws.column_dimensions[get_column_letter(idx)].width = target_widths.get(name, 24)
-    _safe_write_excel(_write, EXCEL_PATH)
+    _safe_write_excel(lambda path: write_complaints_workbook(df_out, path), EXCEL_PATH)
 
 # [MICROSOFT GRAPH]
 GRAPH_BASE = "https://graph.microsoft.com/v1.0"
 
+# One keep-alive connection pool for Graph and Gemini instead of a new TCP/TLS
+# handshake per page/call. No adapter-level retries: the callers already retry
+# with their own backoff and logging. requests asks for gzip by default.
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.headers["Accept"] = "application/json"
+GRAPH_TIMEOUT = (10, 60)  # (connect, read) seconds; a stalled page is retried instead of hanging the sync
+
 def graph_headers(token: str):
     return {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
 
-def fetch_messages_since(start_iso: str, mailbox: str = MAILBOX, page_size: int = 50):
-    token = get_token()
+def _messages_path(mailbox: str = MAILBOX) -> str:
+    """Graph messages collection for `mailbox`, relative to GRAPH_BASE"""
     if mailbox and mailbox != "me":
-        base = f"{GRAPH_BASE}/users/{mailbox}/messages"
-    else:
-        base = f"{GRAPH_BASE}/me/messages"
+        return f"/users/{mailbox}/messages"
+    return "/me/messages"
+
+# What process() reads from every message to pick and gate conversations. Bodies
+# dominate the payload and are fetched separately (fetch_message_bodies), only
+# for the conversations that survive the gates.
+MESSAGE_INDEX_SELECT = "id,conversationId,receivedDateTime,subject,from,webLink"
+
+def fetch_messages_since(start_iso: str, mailbox: str = MAILBOX, page_size: int = 999,
+                         select: str = MESSAGE_INDEX_SELECT):
+    token = get_token()
     params = {
         "$top": page_size,
         "$orderby": "receivedDateTime asc",
         "$filter": f"receivedDateTime ge {start_iso}",
-        "$select": "id,conversationId,receivedDateTime,subject,from,body,webLink,bodyPreview,internetMessageId"
+        "$select": select,
     }
-    url = f"{base}?{urlencode(params)}"
+    url = f"{GRAPH_BASE}{_messages_path(mailbox)}?{urlencode(params)}"
 
     # Retry settings for transient errors (503, 429, 500, 502, 504)
     max_retries = 5
@@ -931,12 +1296,21 @@ def fetch_messages_since(start_iso: str, mailbox: str = MAILBOX, page_size: int
         resp = None
 
         while retries < max_retries:
-            resp = requests.get(url, headers=graph_headers(token))
+            try:
+                resp = SESSION.get(url, headers=graph_headers(token), timeout=GRAPH_TIMEOUT)
 
-            # Handle auth errors
-            if resp.status_code == 401:
-                token = get_token()
-                resp = requests.get(url, headers=graph_headers(token))
+                # Handle auth errors
+                if resp.status_code == 401:
+                    token = get_token()
+                    resp = SESSION.get(url, headers=graph_headers(token), timeout=GRAPH_TIMEOUT)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                retries += 1
+                if retries >= max_retries:
+                    raise
+                wait_time = retry_delay * (2 ** (retries - 1))
+                print(f"[WARN] Graph request failed ({type(e).__name__}), retrying in {wait_time}s... (attempt {retries}/{max_retries})")
+                time.sleep(wait_time)
+                continue
 
             # Success
             if resp.status_code == 200:
@@ -956,7 +1330,7 @@ def fetch_messages_since(start_iso: str, mailbox: str = MAILBOX, page_size: int
         if resp.status_code != 200:
             raise RuntimeError(f"Graph error {resp.status_code}: {resp.text}")
 
-        data = resp.json()
+        data = fast_json.loads(resp.content)
         for item in data.get("value", []):
             yield item
         next_link = data.get("@odata.nextLink")
@@ -964,45 +1338,142 @@ def fetch_messages_since(start_iso: str, mailbox: str = MAILBOX, page_size: int
             break
         url = next_link
 
-def fetch_earliest_in_conversation(conversation_id: str, mailbox: str = MAILBOX):
-    token = get_token()
-    if mailbox and mailbox != "me":
-        base = f"{GRAPH_BASE}/users/{mailbox}/messages"
-    else:
-        base = f"{GRAPH_BASE}/me/messages"
+def _earliest_in_conversation_path(conversation_id: str, mailbox: str = MAILBOX) -> str:
+    """Graph path (relative to GRAPH_BASE) for a conversation's first message"""
     params = {
         "$top": 1,
         "$orderby": "receivedDateTime asc",
         "$filter": f"conversationId eq '{conversation_id}'",
         "$select": "id,receivedDateTime,from"
     }
-    url = f"{base}?{urlencode(params)}"
-    resp = requests.get(url, headers=graph_headers(token))
+    return f"{_messages_path(mailbox)}?{urlencode(params)}"
+
+def fetch_earliest_in_conversation(conversation_id: str, mailbox: str = MAILBOX):
+    token = get_token()
+    url = GRAPH_BASE + _earliest_in_conversation_path(conversation_id, mailbox)
+    resp = SESSION.get(url, headers=graph_headers(token), timeout=GRAPH_TIMEOUT)
     if resp.status_code == 401:
         token = get_token()
-        resp = requests.get(url, headers=graph_headers(token))
+        resp = SESSION.get(url, headers=graph_headers(token), timeout=GRAPH_TIMEOUT)
     if resp.status_code != 200:
         raise RuntimeError(f"Graph (earliest) error {resp.status_code}: {resp.text}")
-    vals = resp.json().get("value", [])
+    vals = fast_json.loads(resp.content).get("value", [])
     return vals[0] if vals else None
 
+GRAPH_BATCH_MAX = 20  # Graph's JSON batching limit per $batch request
+
+def _graph_batch_get(paths: dict, max_rounds: int = 4) -> dict:
+    """GET many Graph paths via $batch, GRAPH_BATCH_MAX per call: {key: (status, body)}.
+
+    `paths` maps caller keys to paths relative to GRAPH_BASE. Batches are sent one
+    after another (Exchange allows only a few concurrent requests per mailbox);
+    items throttled or failing with 5xx are resent in the next round after their
+    Retry-After. Keys still failing after the last round are left out.
+    """
+    results = {}
+    pending = list(paths)
+    token = get_token()
+    for round_no in range(1, max_rounds + 1):
+        retry, wait_s = [], 0
+        for i in range(0, len(pending), GRAPH_BATCH_MAX):
+            chunk = pending[i:i + GRAPH_BATCH_MAX]
+            payload = {"requests": [
+                {"id": str(n), "method": "GET", "url": paths[key]} for n, key in enumerate(chunk)
+            ]}
+            try:
+                resp = SESSION.post(f"{GRAPH_BASE}/$batch", headers=graph_headers(token),
+                                    json=payload, timeout=GRAPH_TIMEOUT)
+                if resp.status_code == 401:
+                    token = get_token()
+                    resp = SESSION.post(f"{GRAPH_BASE}/$batch", headers=graph_headers(token),
+                                        json=payload, timeout=GRAPH_TIMEOUT)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                print(f"[WARN] Graph $batch failed ({type(e).__name__})")
+                retry.extend(chunk)
+                continue
+            if resp.status_code != 200:
+                print(f"[WARN] Graph $batch error {resp.status_code}: {resp.text[:200]}")
+                if resp.status_code in (429, 500, 502, 503, 504):
+                    retry.extend(chunk)
+                continue
+            for item in fast_json.loads(resp.content).get("responses", []):
+                key = chunk[int(item["id"])]
+                status = item.get("status")
+                if status in (429, 500, 502, 503, 504):
+                    retry.append(key)
+                    try:
+                        wait_s = max(wait_s, int((item.get("headers") or {}).get("Retry-After", 0)))
+                    except ValueError:
+                        pass
+                else:
+                    results[key] = (status, item.get("body") or {})
+        if not retry:
+            break
+        pending = retry
+        if round_no < max_rounds:
+            wait_s = max(wait_s, 2 ** round_no)
+            print(f"[WARN] {len(retry)} Graph batch requests throttled, retrying in {wait_s}s...")
+            time.sleep(wait_s)
+    return results
+
+def fetch_earliest_batch(conversation_ids, mailbox: str = MAILBOX) -> dict:
+    """{conversation_id: first message} for many conversations, via $batch"""
+    paths = {cid: _earliest_in_conversation_path(cid, mailbox) for cid in conversation_ids}
+    found = {}
+    for cid, (status, body) in _graph_batch_get(paths).items():
+        vals = body.get("value", []) if status == 200 else []
+        if vals:
+            found[cid] = vals[0]
+    return found
+
+def fetch_message_bodies(message_ids, mailbox: str = MAILBOX) -> dict:
+    """{message_id: {"contentType", "content"}} via $batch.
+
+    Raises if a body can't be fetched (same as a failed page in fetch_messages_since),
+    so a sync never classifies a conversation without its text. A message deleted
+    since it was listed (404) gets an empty body.
+    """
+    base = _messages_path(mailbox)
+    paths = {mid: f"{base}/{quote(mid, safe='')}?$select=body" for mid in message_ids}
+    results = _graph_batch_get(paths)
+    bodies = {}
+    for mid in paths:
+        status, body = results.get(mid, (None, {}))
+        if status == 200:
+            bodies[mid] = body.get("body") or {}
+        elif status == 404:
+            bodies[mid] = {}
+        else:
+            raise RuntimeError(f"Graph (body) error {status}: {str(body)[:200]}")
+    return bodies
+
 # [GEMINI]
-def gemini_client():
+def gemini_client(preflight_error=None):
+    """Report the Gemini setup to the user and return the model, or None.
+
+    `preflight_error` is a finished _gemini_preflight_error() result; the check
+    runs here when it is not given. Call on the script thread (st.* messages).
+    """
     if not GEMINI_API_KEY:
         st.warning("GEMINI_API_KEY not set. AI email processing disabled.")
         return None
 
+    import google.generativeai as genai
+
     # Show debug info to user
     key_preview = _mask_key(GEMINI_API_KEY)
     st.info(f"Loading API key from: **{CONFIG_SOURCE}** (ends with: ...{GEMINI_API_KEY[-4:] if len(GEMINI_API_KEY) >= 4 else 'N/A'})")
     print(f"[CONFIG] Loaded GEMINI_API_KEY from {CONFIG_SOURCE}:", key_preview)
 
-    if not _gemini_preflight(genai, GEMINI_API_KEY, "gemini-3.1-pro-preview"):
+    if preflight_error is None:
+        preflight_error = _gemini_preflight_error("gemini-3.1-pro-preview")
+    if preflight_error:
+        st.error(f"Gemini API key invalid or expired: {preflight_error}")
         st.warning("Gemini API unavailable. AI email processing disabled. Dashboard will still work for manual data entry.")
         return None
 
     st.success("Gemini API connected successfully!")
-    genai.configure(api_key=GEMINI_API_KEY)
+    genai.configure(api_key=GEMINI_API_KEY, transport="rest")
     return genai.GenerativeModel(
         model_name="gemini-3.1-pro-preview",
         generation_config={
@@ -1013,40 +1484,120 @@ def gemini_client():
 
 GEMINI_MODEL = "gemini-3.1-pro-preview"
 GEMINI_REST_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
-
-def gemini_extract(model, subject_clean: str, from_email: str, latest_reply: str,
-                   timeout_s: int = 45, retries: int = 4, backoff: float = 3.0,
-                   max_body_chars: int = 8000) -> dict:
-    # Truncate very long email bodies to avoid Gemini timeouts
+_GEMINI_SYSTEM_INSTRUCTION = {"parts": [{"text": SYSTEM_PROMPT}]}
+# Body characters sent per email. The body starts with the latest reply, so the cut
+# falls on older quoted history first; input tokens (cost, latency) scale with this.
+MAX_LLM_CHARS = int(os.getenv("MAX_LLM_CHARS", "4000"))
+
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.S)  # outermost {...} when the reply wraps its JSON
+_GEMINI_FALLBACK = {"is_complaint": False, "summary": "", "category_suggested": "Other", "case_key": "", "part_number": ""}
+
+# blake2b state after hashing "{model}\0{SYSTEM_PROMPT}\0"; copied per email
+_GEMINI_CACHE_KEY_PREFIX = hashlib.blake2b(
+    f"{GEMINI_MODEL}\0{SYSTEM_PROMPT}\0".encode("utf-8"), digest_size=16
+)
+
+def gemini_prompt(subject_clean: str, from_email: str, latest_reply: str,
+                  max_body_chars: int = MAX_LLM_CHARS) -> Tuple[str, bytes]:
+    """(user prompt, response-cache key) for one email"""
+    # Truncate long email bodies (quoted chains) to bound tokens and avoid timeouts
     body_text = latest_reply[:max_body_chars] if len(latest_reply) > max_body_chars else latest_reply
-    prompt = PROMPT_TEXT.format(
-        subject_clean=subject_clean,
-        from_email=from_email,
-        body_text=body_text
-    )
-    # Use REST API directly to avoid SDK internal retry stacking on 504s
+    head, after_subject, after_from, tail = USER_TEMPLATE_PARTS
+    prompt = "".join((head, subject_clean, after_subject, from_email, after_from, body_text, tail))
+    # Same model + prompt -> same answer (temperature 0). Non-complaints never reach
+    # the complaints table, so without this every sync re-sends them to Gemini.
+    h = _GEMINI_CACHE_KEY_PREFIX.copy()
+    h.update(prompt.encode("utf-8"))
+    return prompt, h.digest()
+
+def gemini_cached(cache_key: bytes, con=None):
+    """Stored response for `cache_key`, or None"""
+    with _db(con) as c:
+        hit = c.execute("SELECT response FROM gemini_cache WHERE hash=?", (cache_key,)).fetchone()
+    if hit:
+        try:
+            return fast_json.loads(hit[0])
+        except ValueError:
+            pass
+    return None
+
+def gemini_store(cache_key: bytes, result: dict, con=None):
+    with _db(con) as c:
+        c.execute(
+            "INSERT OR REPLACE INTO gemini_cache (hash, response, ts) VALUES (?, ?, ?)",
+            (cache_key, fast_json.dumps(result), int(time.time())),
+        )
+
+# The same sender + subject + new text judged "not a complaint" this many times
+# (auto-replies, newsletters, templated notifications) skips Gemini. The latest
+# reply is part of the key: a thread's later messages share sender and subject,
+# and a complaint posted in one must still be classified.
+NOISE_REPEAT_MIN = 2
+
+def noise_key(subject_clean: str, sender_email: str, latest_reply: str) -> bytes:
+    return hashlib.blake2b(
+        f"{(sender_email or '').lower()}\0{subject_clean}\0{latest_reply}".encode("utf-8"),
+        digest_size=16,
+    ).digest()
+
+def is_known_noise(key: bytes, con=None) -> bool:
+    with _db(con) as c:
+        hit = c.execute("SELECT hits FROM noise_hashes WHERE hash=?", (key,)).fetchone()
+    return bool(hit) and hit[0] >= NOISE_REPEAT_MIN
+
+def record_noise_verdict(key: bytes, is_complaint: bool, con=None):
+    """Count a non-complaint verdict for `key`; a complaint clears it for good measure"""
+    with _db(con) as c:
+        if is_complaint:
+            c.execute("DELETE FROM noise_hashes WHERE hash=?", (key,))
+        else:
+            c.execute("""
+                INSERT INTO noise_hashes (hash, hits, ts) VALUES (?, 1, ?)
+                ON CONFLICT(hash) DO UPDATE SET hits = hits + 1, ts = excluded.ts
+            """, (key, int(time.time())))
+
+_GEMINI_RETRY_STATUSES = (408, 429, 500, 502, 503, 504)  # others (bad request, key) won't improve
+GEMINI_BACKOFF_CAP_S = 8.0
+
+def _gemini_retry_delay(attempt: int, backoff: float, retry_after=None) -> float:
+    """Server's Retry-After when given, else full-jitter exponential backoff (capped)"""
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return random.uniform(0.2, min(GEMINI_BACKOFF_CAP_S, backoff * 2 ** (attempt - 1)))
+
+def gemini_request(prompt: str, timeout_s: int = 45, retries: int = 4, backoff: float = 0.5):
+    """Classify one prompt over REST; parsed dict, or None if every attempt failed.
+    Network only (no DB access), so it is safe to run on worker threads."""
+    # The static instructions go first as systemInstruction so every request shares
+    # the same prefix (eligible for Gemini's implicit prefix caching)
     payload = {
-        "contents": [{"parts": [{"text": prompt}]}],
+        "systemInstruction": _GEMINI_SYSTEM_INSTRUCTION,
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
         "generationConfig": {
             "responseMimeType": "application/json",
             "temperature": 0,
         },
     }
-    last_exc = None
     for attempt in range(1, retries + 1):
+        retry_after = None
         try:
-            resp = requests.post(
+            resp = SESSION.post(
                 f"{GEMINI_REST_URL}?key={GEMINI_API_KEY}",
                 json=payload, timeout=timeout_s,
             )
             if resp.status_code != 200:
+                if resp.status_code not in _GEMINI_RETRY_STATUSES:
+                    print(f"[ERROR] Gemini rejected the request: {resp.status_code} {resp.text[:200]}")
+                    return None
+                retry_after = resp.headers.get("Retry-After")
                 raise RuntimeError(f"{resp.status_code} {resp.text[:200]}")
-            text = resp.json()["candidates"][0]["content"]["parts"][0]["text"]
+            text = fast_json.loads(resp.content)["candidates"][0]["content"]["parts"][0]["text"]
             try:
-                data = json.loads(text)
+                data = fast_json.loads(text)
             except Exception:
-                m = re.search(r"\{.*\}", text, flags=re.S)
-                data = json.loads(m.group(0)) if m else {}
+                m = _JSON_OBJECT_RE.search(text)
+                data = fast_json.loads(m.group(0)) if m else {}
             if isinstance(data, list):
                 data = data[0] if len(data) == 1 and isinstance(data[0], dict) else {}
             if not isinstance(data, dict):
@@ -1059,15 +1610,27 @@ def gemini_extract(model, subject_clean: str, from_email: str, latest_reply: str
                 "part_number": data.get("part_number", ""),
             }
         except Exception as e:
-            last_exc = e
             if attempt < retries:
-                sleep_for = backoff ** (attempt - 1)
+                sleep_for = _gemini_retry_delay(attempt, backoff, retry_after)
                 print(f"[WARN] Gemini call failed (attempt {attempt}/{retries}): {e}")
                 time.sleep(sleep_for)
             else:
                 print(f"[ERROR] Gemini failed after {retries} attempts: {e}")
-                break
-    return {"is_complaint": False, "summary": "", "category_suggested": "Other", "case_key": "", "part_number": ""}
+    return None
+
+def gemini_extract(model, subject_clean: str, from_email: str, latest_reply: str,
+                   timeout_s: int = 45, retries: int = 4, backoff: float = 0.5,
+                   max_body_chars: int = MAX_LLM_CHARS, con=None) -> dict:
+    prompt, cache_key = gemini_prompt(subject_clean, from_email, latest_reply, max_body_chars)
+    cached = gemini_cached(cache_key, con)
+    if cached is not None:
+        return cached
+    # Use REST API directly to avoid SDK internal retry stacking on 504s
+    result = gemini_request(prompt, timeout_s, retries, backoff)
+    if result is None:
+        return dict(_GEMINI_FALLBACK)
+    gemini_store(cache_key, result, con)
+    return result
 
 def tighten_summary(s: str, max_words=45):
     words = (s or "").split()
@@ -1079,6 +1642,37 @@ CATEGORIES = [
 ]
 
 # [MAIN PROCESS FUNCTION]
+SYNC_COMMIT_EVERY = 50  # conversations per write transaction during a sync
+GEMINI_WORKERS = 8  # concurrent Gemini requests during a sync
+def _backfill_earliest(con, pending):
+    """Fold each new conversation's earliest Graph message into the row it was written to.
+
+    `pending` holds (target_conversation_id, source_conversation_id, fill_initiator).
+    The lookups are independent, so they are fetched together via $batch after the
+    ingest loop; first_seen_utc only ever moves earlier, so applying it late gives
+    the same stored value as applying it before the upsert.
+    """
+    if not pending:
+        return
+    try:
+        earliest_by_conv = fetch_earliest_batch([src for _, src, _ in pending])
+    except Exception as e:
+        print(f"[WARN] Earliest-message lookup failed: {e}")
+        return
+    for target_conv, source_conv, fill_initiator in pending:
+        earliest = earliest_by_conv.get(source_conv)
+        if not earliest:
+            continue
+        earliest_iso = _min_iso(earliest.get("receivedDateTime", "")) or None
+        sender = ((earliest.get("from") or {}).get("emailAddress") or {}).get("address", "")
+        con.execute("""
+            UPDATE complaints SET
+                first_seen_utc = MIN(IFNULL(first_seen_utc, :iso), IFNULL(:iso, first_seen_utc)),
+                initiator_email = CASE WHEN :fill AND IFNULL(initiator_email, '') = '' AND :sender != ''
+                                       THEN :sender ELSE initiator_email END
+            WHERE conversation_id = :conv
+        """, {"iso": earliest_iso, "fill": fill_initiator, "sender": sender, "conv": target_conv})
+
 def process(override_start_date=None, log_callback=None):
     """
     Main sync process.
@@ -1119,6 +1713,15 @@ def process(override_start_date=None, log_callback=None):
         start_iso = START_DATE
     log(f"[INFO] Using start date: {start_iso}")
     log(f"[INFO] Mailbox: {MAILBOX}")
+
+    # The Gemini preflight is a network round-trip; run it while Graph is paged through
+    # (only the ping runs there; gemini_client reports the result on this thread)
+    gemini_future = None
+    if GEMINI_API_KEY:
+        gemini_pool = ThreadPoolExecutor(max_workers=1)
+        gemini_future = gemini_pool.submit(_gemini_preflight_error, "gemini-3.1-pro-preview")
+        gemini_pool.shutdown(wait=False)
+
     log("[INFO] Fetching messages from Graph API...")
 
     skipped_no_conv = 0
@@ -1143,11 +1746,10 @@ def process(override_start_date=None, log_callback=None):
         if not rdt:
             skipped_no_rdt += 1
             continue
-        if conv_id not in first_msg_by_conv:
-            first_msg_by_conv[conv_id] = msg
-        prev = latest_msg_by_conv.get(conv_id)
-        if (not prev) or (rdt > prev.get("receivedDateTime", "")):
-            latest_msg_by_conv[conv_id] = msg
+        # Pages arrive in receivedDateTime order ($orderby asc), so a conversation's
+        # first message is the first one seen and its latest is the last one seen
+        first_msg_by_conv.setdefault(conv_id, msg)
+        latest_msg_by_conv[conv_id] = msg
 
     log(f"[INFO] Fetched {checked} messages from Graph API")
     if skipped_no_conv > 0:
@@ -1169,156 +1771,227 @@ def process(override_start_date=None, log_callback=None):
         }
 
     log("[INFO] Initializing Gemini AI model...")
-    model = gemini_client()
+    model = gemini_client(gemini_future.result() if gemini_future is not None else None)
     log("[INFO] Processing conversations through AI filter...")
     total_convs = len(latest_msg_by_conv)
     conv_processed = 0
     gemini_calls = 0
 
-    for conv_id, msg in latest_msg_by_conv.items():
-        conv_processed += 1
-        if conv_processed % 50 == 0 or conv_processed == 1:
-            log(f"[INFO] Scanning: {conv_processed}/{total_convs} | Sent to AI: {gemini_calls} | Complaints: {new_threads} | Unchanged: {unchanged}")
-
-        subject_raw = msg.get("subject") or ""
-        subject_clean = clean_subject(subject_raw)
-        sender_email = ((msg.get("from") or {}).get("emailAddress") or {}).get("address", "")
-        rdt = msg.get("receivedDateTime") or ""
-        body = msg.get("body") or {}
-        body_content = body.get("content") or ""
-        content_type = body.get("contentType") or "text"
-        body_plain = strip_html(body_content) if content_type.lower() == "html" else body_content
-        latest_reply = trim_to_latest_reply(body_plain)
-        tail_text = body_plain[len(latest_reply):].strip() if len(body_plain) > len(latest_reply) else ""
+    # One connection for the whole ingest loop; writes are grouped into explicit
+    # transactions committed every SYNC_COMMIT_EVERY conversations and at the end.
+    # If anything raises (Graph, a body fetch), the open batch is rolled back and the
+    # connection closed, so no write lock outlives the sync.
+    con = connect_db()
+    # Phase 1 (read-only): gate each conversation on the body-less index, batch-download
+    # the survivors' bodies, and start their Gemini requests on a worker pool; cache
+    # lookups stay on this thread's connection.
+    # Phase 2: consume the answers in the original order and do every DB write here,
+    # so merges see earlier rows exactly as in a sequential run.
+    classify_pool = ThreadPoolExecutor(max_workers=GEMINI_WORKERS)
+    try:
+        purge_expired_caches(con)  # committed on its own, before the ingest transactions
+        index = ComplaintIndex(con)  # existing rows, kept current as the loop writes
+        earliest_pending = []  # new conversations to backfill via _backfill_earliest
+
+        queued = []
+        to_classify = []  # indexes into queued that need a body and a Gemini answer
+        for conv_id, msg in latest_msg_by_conv.items():
+            conv_processed += 1
+            if conv_processed % 50 == 0 or conv_processed == 1:
+                log(f"[INFO] Scanning: {conv_processed}/{total_convs} | Sent to AI: {gemini_calls} | Unchanged: {unchanged}")
+
+            subject_raw = msg.get("subject") or ""
+            subject_clean = clean_subject(subject_raw)
+            sender_email = ((msg.get("from") or {}).get("emailAddress") or {}).get("address", "")
+            rdt = msg.get("receivedDateTime") or ""
+            existing_by_conv = index.by_conversation(conv_id)
+            if existing_by_conv:
+                existing_rdt = existing_by_conv[1] or ""
+                if existing_rdt and existing_rdt >= rdt:
+                    unchanged += 1
+                    continue
         
-        if conv_processed <= 3:
-            log(f"[DEBUG] Conv {conv_processed}: subject='{subject_clean[:40]}' body_len={len(body_plain)} sender={sender_email}")
-        existing_by_conv = get_by_conversation_id(conv_id)
-        if existing_by_conv:
-            existing_rdt = existing_by_conv[1] or ""
-            if existing_rdt and existing_rdt >= rdt:
-                unchanged += 1
+            if is_noise_email(subject_clean, sender_email):
+                queued.append((conv_id, msg, subject_clean, sender_email, rdt, None))
                 continue
-        
-        if is_noise_email(subject_clean, sender_email):
+            queued.append([conv_id, msg, subject_clean, sender_email, rdt, None])
+            to_classify.append(len(queued) - 1)
+
+        # Bodies only for conversations that survived the cheap subject/sender gates
+        if to_classify:
+            log(f"[INFO] Downloading {len(to_classify)} message bodies...")
+        bodies = fetch_message_bodies([queued[i][1]["id"] for i in to_classify])
+        for i in to_classify:
+            entry = queued[i]
+            subject_clean, sender_email = entry[2], entry[3]
+            body = bodies.get(entry[1]["id"]) or {}
+            body_content = body.get("content") or ""
+            content_type = body.get("contentType") or "text"
+
+            body_plain = strip_html(body_content) if content_type.lower() == "html" else body_content
+            latest_reply = trim_to_latest_reply(body_plain)
+            tail_text = body_plain[len(latest_reply):].strip() if len(body_plain) > len(latest_reply) else ""
+            if is_known_noise(noise_key(subject_clean, sender_email, latest_reply), con):
+                continue  # entry[5] stays None: handled as noise
+
+            gemini_calls += 1
+            if gemini_calls <= 3:
+                log(f"[DEBUG] Calling Gemini #{gemini_calls} for: '{subject_clean[:40]}' body_len={len(body_content)} sender={sender_email}")
+            prompt, cache_key = gemini_prompt(subject_clean, sender_email, body_plain)
+            llm = gemini_cached(cache_key, con)
+            if llm is None:
+                llm = classify_pool.submit(gemini_request, prompt)
+            entry[5] = (body_plain, latest_reply, tail_text, cache_key, llm)
+
+        log(f"[INFO] Classifying {len(queued)} conversations...")
+        for done, (conv_id, msg, subject_clean, sender_email, rdt, work) in enumerate(queued, 1):
+            if (done - 1) % SYNC_COMMIT_EVERY == 0:
+                con.commit()
+                # Wait for this batch's Gemini answers before its first write, so the
+                # write transaction never stays open across a network round-trip
+                batch = queued[done - 1:done - 1 + SYNC_COMMIT_EVERY]
+                wait([e[5][-1] for e in batch if e[5] is not None and isinstance(e[5][-1], Future)])
+            if done % 50 == 0:
+                log(f"[INFO] Classified: {done}/{len(queued)} | Complaints: {new_threads} | Updated: {updated_threads}")
+
+            # An earlier conversation in this run may have been merged into this row
+            existing_by_conv = index.by_conversation(conv_id)
             if existing_by_conv:
-                touch_conversation(conv_id, rdt)
-            filtered_noise += 1
-            filtered_out += 1
-            continue
+                existing_rdt = existing_by_conv[1] or ""
+                if existing_rdt and existing_rdt >= rdt:
+                    unchanged += 1
+                    continue
+
+            if work is None:  # noise
+                if existing_by_conv:
+                    touch_conversation(conv_id, rdt, con)
+                    index.touch(conv_id, rdt)
+                filtered_noise += 1
+                filtered_out += 1
+                continue
 
-        gemini_calls += 1
-        if gemini_calls <= 3:
-            log(f"[DEBUG] Calling Gemini #{gemini_calls} for: '{subject_clean[:40]}'")
-        llm_out = gemini_extract(model, subject_clean, sender_email, body_plain)
-        if not llm_out.get("is_complaint", False):
-            if existing_by_conv:
-                touch_conversation(conv_id, rdt)
-            filtered_not_complaint += 1
-            filtered_out += 1
-            continue
+            body_plain, latest_reply, tail_text, cache_key, llm = work
+            if not isinstance(llm, dict):
+                llm = llm.result()
+                if llm is None:
+                    llm = dict(_GEMINI_FALLBACK)
+                else:
+                    gemini_store(cache_key, llm, con)
+                    record_noise_verdict(noise_key(subject_clean, sender_email, latest_reply),
+                                         bool(llm.get("is_complaint")), con)
+            llm_out = llm
+            if not llm_out.get("is_complaint", False):
+                if existing_by_conv:
+                    touch_conversation(conv_id, rdt, con)
+                    index.touch(conv_id, rdt)
+                filtered_not_complaint += 1
+                filtered_out += 1
+                continue
         
-        summary = tighten_summary(llm_out.get("summary", ""))
-        cat = llm_out.get("category_suggested", "Other")
-        category_suggested = cat if cat in CATEGORIES else "Other"
+            summary = tighten_summary(llm_out.get("summary", ""))
+            cat = llm_out.get("category_suggested", "Other")
+            category_suggested = cat if cat in CATEGORIES else "Other"
         
-        pn_master, pn_fallback, _hay_raw1, hay_alnum1 = extract_pn_candidates(subject_clean, latest_reply)
-        pn_master2 = pn_fallback2 = None
-        hay_alnum2 = ""
-        if not pn_master and not pn_fallback and tail_text:
-            pn_master2, pn_fallback2, _hay_raw2, hay_alnum2 = extract_pn_candidates("", tail_text)
+            pn_master, pn_fallback, _hay_raw1, hay_alnum1 = extract_pn_candidates(subject_clean, latest_reply)
+            pn_master2 = pn_fallback2 = None
+            hay_alnum2 = ""
+            if not pn_master and not pn_fallback and tail_text:
+                pn_master2, pn_fallback2, _hay_raw2, hay_alnum2 = extract_pn_candidates("", tail_text)
         
-        pn_final = pn_master or pn_master2 or pn_fallback or pn_fallback2
+            pn_final = pn_master or pn_master2 or pn_fallback or pn_fallback2
         
-        if not pn_final:
-            llm_pn = llm_out.get("part_number")
-            if llm_pn and is_valid_pn_basic(llm_pn):
-                llm_norm = normalize_pn(llm_pn)
-                alnum_llm = _alnum(llm_pn)
-                if (PN_MASTER_SET and llm_norm in PN_MASTER_SET) or (alnum_llm in (hay_alnum1 or "") or alnum_llm in (hay_alnum2 or "")):
-                    pn_final = llm_pn
+            if not pn_final:
+                llm_pn = llm_out.get("part_number")
+                if llm_pn and is_valid_pn_basic(llm_pn):
+                    llm_norm = normalize_pn(llm_pn)
+                    alnum_llm = _alnum(llm_pn)
+                    if (PN_MASTER_SET and llm_norm in PN_MASTER_SET) or (alnum_llm in (hay_alnum1 or "") or alnum_llm in (hay_alnum2 or "")):
+                        pn_final = llm_pn
         
-        if not pn_final:
-            pn_final = MISSING_PN
+            if not pn_final:
+                pn_final = MISSING_PN
         
-        anywhere_iso = extract_earliest_datetime_anywhere(body_plain)
-        helper_iso, helper_sender = compute_first_seen_initiator(
-            conversation_id=conv_id,
-            full_body_plain=body_plain,
-            fallback_sender=sender_email,
-            mailbox=MAILBOX,
-        )
+            anywhere_iso = extract_earliest_datetime_anywhere(body_plain)
+            helper_iso, helper_sender = compute_first_seen_initiator(
+                conversation_id=conv_id,
+                full_body_plain=body_plain,
+                fallback_sender=sender_email,
+                mailbox=MAILBOX,
+            )
         
-        first_seen_utc = _min_iso(anywhere_iso, helper_iso, rdt)
-        initiator_email = helper_sender or sender_email
-        first_seen_utc = first_seen_utc or rdt
+            first_seen_utc = _min_iso(anywhere_iso, helper_iso, rdt)
+            initiator_email = helper_sender or sender_email
+            first_seen_utc = first_seen_utc or rdt
         
-        domain = (sender_email or "").split("@")[-1]
-        pn_norm = normalize_pn(pn_final)
-        case_key = canonical_case_key(
-            domain=domain,
-            pn_norm=pn_norm,
-            subject=subject_clean,
-            text_for_ids=f"{latest_reply}\n{summary}"
-        )
-        
-        thread_url = msg.get("webLink") or ""
+            domain = (sender_email or "").split("@")[-1]
+            pn_norm = normalize_pn(pn_final)
+            case_key = canonical_case_key(
+                domain=domain,
+                pn_norm=pn_norm,
+                subject=subject_clean,
+                text_for_ids=f"{latest_reply}\n{summary}"
+            )
         
-        if not existing_by_conv:
-            try:
-                earliest = fetch_earliest_in_conversation(conv_id)
-                if earliest:
-                    graph_api_earliest_iso = earliest.get("receivedDateTime", "")
-                    first_seen_utc = _min_iso(first_seen_utc, graph_api_earliest_iso)
-                    if not initiator_email:
-                        initiator_email = (
-                            ((earliest.get("from") or {}).get("emailAddress") or {}).get("address", "")
-                            or initiator_email
-                        )
-            except Exception:
-                pass
+            thread_url = msg.get("webLink") or ""
         
-        row = {
-            "conversation_id": conv_id,
-            "received_utc": rdt,
-            "from_email": sender_email,
-            "subject": subject_clean,
-            "jo_number": None,
-            "part_number": pn_final,
-            "category": category_suggested,
-            "summary": summary,
-            "case_key": case_key,
-            "thread_url": thread_url,
-            "first_seen_utc": first_seen_utc,
-            "initiator_email": initiator_email,
-        }
+            row = {
+                "conversation_id": conv_id,
+                "received_utc": rdt,
+                "from_email": sender_email,
+                "subject": subject_clean,
+                "jo_number": None,
+                "part_number": pn_final,
+                "category": category_suggested,
+                "summary": summary,
+                "case_key": case_key,
+                "thread_url": thread_url,
+                "first_seen_utc": first_seen_utc,
+                "initiator_email": initiator_email,
+            }
         
-        existing_by_case = get_by_case_key(case_key)
+            existing_by_case = index.by_case(case_key)
         
-        if existing_by_conv:
-            upsert_row(row)
-            updated_threads += 1
-            prev_pn = (existing_by_conv[2] or "").strip()
-            if prev_pn == MISSING_PN and pn_final != MISSING_PN:
-                updates_log.append(f"Updated thread (PN captured): {subject_clean} (PN: {pn_final})")
-            else:
-                updates_log.append(f"Updated thread: {subject_clean} (PN: {pn_final})")
-        elif existing_by_case:
-            target_conv, target_rdt, target_pn = existing_by_case
-            if (target_rdt or "") >= rdt:
-                unchanged += 1
-                continue
-            update_row_for_conversation(target_conv, row)
-            updated_threads += 1
-            prev_pn = (target_pn or "").strip()
-            if prev_pn == MISSING_PN and pn_final != MISSING_PN:
-                updates_log.append(f"Merged duplicate (PN captured): {subject_clean} → {case_key}")
+            if existing_by_conv:
+                upsert_row(row, con)
+                index.put(conv_id, rdt, pn_final, case_key)
+                updated_threads += 1
+                prev_pn = (existing_by_conv[2] or "").strip()
+                if prev_pn == MISSING_PN and pn_final != MISSING_PN:
+                    updates_log.append(f"Updated thread (PN captured): {subject_clean} (PN: {pn_final})")
+                else:
+                    updates_log.append(f"Updated thread: {subject_clean} (PN: {pn_final})")
+            elif existing_by_case:
+                target_conv, target_rdt, target_pn = existing_by_case
+                if (target_rdt or "") >= rdt:
+                    unchanged += 1
+                    continue
+                update_row_for_conversation(target_conv, row, con)
+                index.put(target_conv, rdt, pn_final, case_key)
+                earliest_pending.append((target_conv, conv_id, not initiator_email))
+                updated_threads += 1
+                prev_pn = (target_pn or "").strip()
+                if prev_pn == MISSING_PN and pn_final != MISSING_PN:
+                    updates_log.append(f"Merged duplicate (PN captured): {subject_clean} → {case_key}")
+                else:
+                    updates_log.append(f"Merged duplicate: {subject_clean} → {case_key}")
             else:
-                updates_log.append(f"Merged duplicate: {subject_clean} → {case_key}")
-        else:
-            upsert_row(row)
-            new_threads += 1
-            updates_log.append(f"Added new case: {subject_clean} (PN: {pn_final})")
+                upsert_row(row, con)
+                index.put(conv_id, rdt, pn_final, case_key)
+                earliest_pending.append((conv_id, conv_id, not initiator_email))
+                new_threads += 1
+                updates_log.append(f"Added new case: {subject_clean} (PN: {pn_final})")
+
+        con.commit()
+        if earliest_pending:
+            log(f"[INFO] Looking up first messages for {len(earliest_pending)} new conversations...")
+            _backfill_earliest(con, earliest_pending)
+            con.commit()
+    finally:
+        # Drops requests still queued if a phase raised (all consumed otherwise)
+        classify_pool.shutdown(wait=False, cancel_futures=True)
+        if con.in_transaction:
+            con.rollback()
+        con.close()
     
     # Log detailed filter breakdown
     log(f"[INFO] === FILTER BREAKDOWN ===")
@@ -1344,7 +2017,8 @@ def process(override_start_date=None, log_callback=None):
     }
 
     if summary["excel_written"]:
-        export_to_excel()
+        # openpyxl serialization takes seconds on large logs; callers get the summary now
+        export_to_excel_in_background()
 
     # Only update START_DATE if we actually processed emails
     # This prevents gaps if sync fails or returns 0 emails
@@ -1368,6 +2042,23 @@ def update_start_date_env():
     env_path = os.path.join(BASE_DIR, ".env")
     if os.path.exists(env_path):
         try:
+            with open(env_path, "rb") as f:
+                raw = f.read()
+            # Same-length value (the usual case: both are YYYY-MM-DDTHH:MM:SSZ): overwrite
+            # just those bytes in place instead of rewriting the file
+            start = 0 if raw.startswith(b"START_DATE=") else raw.find(b"\nSTART_DATE=") + 1
+            if start or raw.startswith(b"START_DATE="):
+                value_at = start + len(b"START_DATE=")
+                end = raw.find(b"\n", value_at)
+                end = len(raw) if end < 0 else end
+                old_value = raw[value_at:end].rstrip(b"\r")
+                new_value = now_iso.encode("ascii")
+                if len(old_value) == len(new_value):
+                    if old_value != new_value:
+                        with open(env_path, "r+b") as f:
+                            f.seek(value_at)
+                            f.write(new_value)
+                    return
             with open(env_path, "r") as f:
                 lines = f.readlines()
             new_lines = []
@@ -1427,7 +2118,7 @@ def send_status_email(subject: str, body: str):
         "saveToSentItems": "true",
     }
     try:
-        resp = requests.post(endpoint, headers=graph_headers(token), json=payload, timeout=15)
+        resp = SESSION.post(endpoint, headers=graph_headers(token), json=payload, timeout=15)
         if resp.status_code == 202:
             print(f"[OK] Status email sent to {NOTIFY_RECIPIENT}")
         else:
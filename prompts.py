@@ -1,4 +1,6 @@
 # prompts.py
+import string
+
 CATEGORIES = [
     "Product","Shipping","Documentation/Revision","Invoicing/RTV",
     "Supplier/SCAR","Damage/Transit","Missing Parts","Other",
@@ -70,7 +72,9 @@ Return STRICT JSON with these keys ONLY:
 - part_number           (string)
 """
 
-PROMPT_TEXT = (
+# Static instructions, sent as the request's system instruction. Identical on every
+# call, so it forms a reusable prompt prefix; only USER_TEMPLATE varies per email.
+SYSTEM_PROMPT = (
     f"You are a manufacturing quality assistant that classifies emails as complaints or non-complaints.\n"
     f"This company (MAC Products) makes electrical and mechanical parts for industrial customers.\n"
     f"Complaints come from BOTH external customers AND internal staff reporting quality issues.\n\n"
@@ -78,11 +82,21 @@ PROMPT_TEXT = (
     f"{CONSTRAINTS}\n\n"
     f"{CLASSIFIER}\n\n"
     f"{OUTPUT_FORMAT}\n\n"
-    "INPUT\n"
-    "SUBJECT (cleaned): {subject_clean}\n"
-    "FROM: {from_email}\n"
-    "BODY TEXT: {body_text}\n\n"
     "Notes:\n"
     "- The system validates part_number against the official master list. If your extracted part_number is not in that list, the system will set it to \"No part number provided\".\n"
     "- Many complaints are INTERNAL emails from @macproducts.net staff discussing defective parts, rejections, rework, or returns. These count as complaints.\n"
 ).replace("{categories}", str(CATEGORIES))
+
+USER_TEMPLATE = (
+    "INPUT\n"
+    "SUBJECT (cleaned): {subject_clean}\n"
+    "FROM: {from_email}\n"
+    "BODY TEXT: {body_text}\n"
+)
+
+# USER_TEMPLATE's literal text around its three fields, for joining without
+# re-parsing the template per email: parts[0] + subject_clean + parts[1] + ...
+USER_TEMPLATE_PARTS = tuple(
+    literal for literal, _field, _spec, _conv in string.Formatter().parse(USER_TEMPLATE)
+)
+assert len(USER_TEMPLATE_PARTS) == 4
@@ -7,6 +7,7 @@ import os
 import sys
 import tempfile
 import shutil
+import sqlite3
 import datetime
 
 REPO_URL = "https://github.com/Anthonyooo0/MAC_Quality_Dashboard.git"
@@ -25,6 +26,29 @@ def run(cmd, cwd=None, check=True):
     return result
 
 
+# Sync-only tables the dashboards never read; leaving them out keeps the file
+# the web dashboard (sql.js) and the Streamlit app download on cold start small
+LOCAL_ONLY_TABLES = ("gemini_cache", "noise_hashes")
+
+
+def snapshot_db(dest_path):
+    """Copy the DB through SQLite's backup API. The live file runs in WAL mode, so
+    recent commits may still be in complaints.db-wal; the copy is a single
+    self-contained, vacuumed file in rollback-journal mode."""
+    src = sqlite3.connect(DB_PATH)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst)
+        for table in LOCAL_ONLY_TABLES:
+            dst.execute(f"DROP TABLE IF EXISTS [{table}]")
+        dst.commit()
+        dst.execute("PRAGMA journal_mode=DELETE")
+        dst.execute("VACUUM")
+    finally:
+        dst.close()
+        src.close()
+
+
 def push():
     if not os.path.exists(DB_PATH):
         print("[ERROR] complaints.db not found")
@@ -49,7 +73,9 @@ def push():
             run(["git", "checkout", "--orphan", "data"], cwd=tmpdir)
 
         # Copy the database
-        shutil.copy2(DB_PATH, os.path.join(tmpdir, "complaints.db"))
+        snapshot_path = os.path.join(tmpdir, "complaints.db")
+        snapshot_db(snapshot_path)
+        print(f"[INFO] Snapshot for dashboards: {os.path.getsize(snapshot_path):,} bytes")
 
         run(["git", "add", "complaints.db"], cwd=tmpdir)
 
@@ -13,7 +13,8 @@ if script_dir not in sys.path:
 # ===== END PATH FIX =====
 
 # Standard library imports
-import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List
 
@@ -24,8 +25,8 @@ import plotly.express as px
 
 # Import from existing modules
 from main import (
-    BASE_DIR, fetch_all_rows, DB_PATH,
-    to_et_naive, init_db
+    BASE_DIR, fetch_all_rows, fetch_latest_per_case, write_complaints_workbook, DB_PATH,
+    series_to_et_naive, init_db, connect_db
 )
 from prompts import CATEGORIES
 
@@ -113,6 +114,32 @@ if 'db_downloaded' not in st.session_state:
 # Helper Functions
 # ==========================================
 
+@st.cache_resource
+def _shared_db():
+    """One connection (and the lock serializing it) for every session and rerun.
+
+    Keeps SQLite's page cache warm between cell edits instead of reconnecting
+    per call; Streamlit serves sessions from several threads, hence the lock.
+    """
+    return connect_db(check_same_thread=False), threading.RLock()
+
+@contextmanager
+def db_connection():
+    con, lock = _shared_db()
+    with lock:
+        try:
+            yield con
+        except BaseException:
+            con.rollback()  # don't leave half a change for the next commit to pick up
+            raise
+
+def _close_shared_db():
+    """Close the shared connection before the database file is replaced underneath it"""
+    con, lock = _shared_db()
+    with lock:
+        con.close()
+        _shared_db.clear()
+
 def download_db_from_github() -> bool:
     """Download complaints.db from the data branch on GitHub."""
     try:
@@ -151,6 +178,7 @@ def download_db_from_github() -> bool:
             # Token may be expired — retry without auth (works for public repos)
             resp = req.get(url, timeout=60)
         if resp.status_code == 200:
+            _close_shared_db()
             with open(DB_PATH, "wb") as f:
                 f.write(resp.content)
             print(f"[OK] Downloaded database from GitHub ({len(resp.content):,} bytes)")
@@ -163,29 +191,33 @@ def download_db_from_github() -> bool:
         return False
 
 
-def load_custom_columns() -> List[str]:
+@st.cache_data(ttl=300, show_spinner=False)
+def _custom_columns_for_version(db_version: tuple) -> List[str]:
     try:
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        cur.execute("CREATE TABLE IF NOT EXISTS custom_columns (column_name TEXT PRIMARY KEY, column_type TEXT DEFAULT 'TEXT')")
-        cur.execute("SELECT column_name FROM custom_columns")
-        cols = [row[0] for row in cur.fetchall()]
-        con.close()
-        return cols
+        with db_connection() as con:
+            cur = con.cursor()
+            cur.execute("CREATE TABLE IF NOT EXISTS custom_columns (column_name TEXT PRIMARY KEY, column_type TEXT DEFAULT 'TEXT')")
+            cur.execute("SELECT column_name FROM custom_columns")
+            return [row[0] for row in cur.fetchall()]
     except Exception:
         return []
 
+def load_custom_columns() -> List[str]:
+    """Custom column names; re-read only after a column edit or a database change"""
+    return _custom_columns_for_version(_db_version())
+
 def save_custom_column(col_name: str) -> bool:
     try:
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        cur.execute("INSERT OR IGNORE INTO custom_columns (column_name) VALUES (?)", (col_name,))
-        cur.execute("PRAGMA table_info(complaints)")
-        existing = [row[1] for row in cur.fetchall()]
-        if col_name not in existing:
-            cur.execute(f"ALTER TABLE complaints ADD COLUMN [{col_name}] TEXT")
-        con.commit()
-        con.close()
+        with db_connection() as con, con:  # inner `with con`: one COMMIT, or ROLLBACK
+            cur = con.cursor()
+            # Take the write lock up front so the column check and ALTER see the same schema
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("INSERT OR IGNORE INTO custom_columns (column_name) VALUES (?)", (col_name,))
+            cur.execute("PRAGMA table_info(complaints)")
+            existing = {row[1] for row in cur.fetchall()}
+            if col_name not in existing:
+                cur.execute(f"ALTER TABLE complaints ADD COLUMN [{col_name}] TEXT")
+        _custom_columns_for_version.clear()
         return True
     except Exception as e:
         st.error(f"Failed to add column: {e}")
@@ -193,11 +225,10 @@ def save_custom_column(col_name: str) -> bool:
 
 def delete_custom_column(col_name: str) -> bool:
     try:
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        cur.execute("DELETE FROM custom_columns WHERE column_name=?", (col_name,))
-        con.commit()
-        con.close()
+        with db_connection() as con:
+            con.execute("DELETE FROM custom_columns WHERE column_name=?", (col_name,))
+            con.commit()
+        _custom_columns_for_version.clear()
         return True
     except Exception as e:
         st.error(f"Failed to delete column: {e}")
@@ -205,17 +236,15 @@ def delete_custom_column(col_name: str) -> bool:
 
 def update_cell_in_db(conversation_id: str, col_name: str, new_value: str):
     try:
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
         col_map = {
             "Date (ET)": "first_seen_utc", "Initiated By": "initiator_email",
             "P/N": "part_number", "Category": "category", "Summary": "summary",
             "Subject": "subject", "Link": "thread_url"
         }
         db_col = col_map.get(col_name, col_name)
-        cur.execute(f"UPDATE complaints SET [{db_col}]=? WHERE conversation_id=?", (new_value, conversation_id))
-        con.commit()
-        con.close()
+        with db_connection() as con:
+            con.execute(f"UPDATE complaints SET [{db_col}]=? WHERE conversation_id=?", (new_value, conversation_id))
+            con.commit()
         return True
     except Exception as e:
         st.error(f"Database error: {e}")
@@ -223,67 +252,92 @@ def update_cell_in_db(conversation_id: str, col_name: str, new_value: str):
 
 def delete_row_from_db(conversation_id: str) -> bool:
     try:
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        cur.execute("DELETE FROM complaints WHERE conversation_id=?", (conversation_id,))
-        con.commit()
-        con.close()
+        with db_connection() as con:
+            con.execute("DELETE FROM complaints WHERE conversation_id=?", (conversation_id,))
+            con.commit()
         return True
     except Exception as e:
         st.error(f"Failed to delete: {e}")
         return False
 
+def _db_version() -> tuple:
+    """Changes whenever complaints.db does (WAL writes land in the -wal file first)"""
+    version = []
+    for path in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            info = os.stat(path)
+            version.append((info.st_mtime_ns, info.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _rows_for_version(db_version: tuple) -> pd.DataFrame:
+    with db_connection() as con:
+        return fetch_all_rows(con)
+
+def load_rows() -> pd.DataFrame:
+    """fetch_all_rows(), re-read only after the database file changes"""
+    return _rows_for_version(_db_version())
+
+# complaints column -> dashboard column, in display order (see load_data)
+DISPLAY_COLUMNS = {
+    "first_seen_utc": "Date (ET)",
+    "initiator_email": "Initiated By",
+    "part_number": "P/N",
+    "category": "Category",
+    "summary": "Summary",
+    "subject": "Subject",
+    "thread_url": "Link",
+}
+
+# Hidden lowercase copies of the text-filter columns (see load_data)
+FILTER_KEY_COLUMNS = {
+    "_pn_key": "P/N",
+    "_initiator_key": "Initiated By",
+    "_subject_key": "Subject",
+}
+
 def load_data() -> pd.DataFrame:
     if not st.session_state.get('db_downloaded', False):
         if download_db_from_github():
             st.session_state.db_downloaded = True
 
     init_db()
-    df = fetch_all_rows()
+    df = load_rows()
     if df.empty:
         return df
 
-    def to_et_wrapper(x):
-        return to_et_naive(x) if pd.notna(x) and str(x).strip() else None
-
-    df["__first_et"] = df["first_seen_utc"].apply(to_et_wrapper) if "first_seen_utc" in df.columns else None
-
-    display = pd.DataFrame()
-    display["Date (ET)"] = df["__first_et"]
-    display["Initiated By"] = df.get("initiator_email", "")
-    display["P/N"] = df.get("part_number", "")
-    display["Category"] = df.get("category", "")
-    display["Summary"] = df.get("summary", "")
-    display["Subject"] = df.get("subject", "")
-    display["Link"] = df.get("thread_url", "")
-
-    custom_cols = load_custom_columns()
-    for col in custom_cols:
-        display[col] = df.get(col, "")
-
-    display["_conversation_id"] = df.get("conversation_id", "")
+    # One projection (missing columns come back as "") instead of a copy per column
+    custom_cols = [c for c in load_custom_columns() if c not in DISPLAY_COLUMNS]
+    source_cols = list(DISPLAY_COLUMNS) + custom_cols + ["conversation_id"]
+    display = df.reindex(columns=source_cols, fill_value="").rename(
+        columns={**DISPLAY_COLUMNS, "conversation_id": "_conversation_id"}
+    )
+    display["Date (ET)"] = series_to_et_naive(df["first_seen_utc"]) if "first_seen_utc" in df.columns else None
+
+    # Case-folded search keys, computed once per load instead of on every rerun
+    for key_col, col in FILTER_KEY_COLUMNS.items():
+        display[key_col] = display[col].astype(str).str.lower()
     return display
 
 def generate_excel_bytes() -> bytes:
+    """Workbook for the download button, rebuilt only after the database changes"""
+    return _excel_bytes_for_version(_db_version())
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _excel_bytes_for_version(db_version: tuple) -> bytes:
     from io import BytesIO
-    from openpyxl.utils import get_column_letter
-    from openpyxl.worksheet.table import Table, TableStyleInfo
-    from openpyxl.styles import Alignment, Font
 
-    df = fetch_all_rows()
+    with db_connection() as con:
+        df = fetch_latest_per_case(con)
     if df.empty:
         buffer = BytesIO()
         pd.DataFrame({"Message": ["No data available"]}).to_excel(buffer, index=False, engine="openpyxl")
         buffer.seek(0)
         return buffer.getvalue()
 
-    if "case_key" in df.columns and "received_utc" in df.columns:
-        df = df.sort_values("received_utc").drop_duplicates(subset=["case_key"], keep="last")
-
-    def _to_et(x):
-        return to_et_naive(x) if pd.notna(x) and str(x).strip() else None
-
-    df["__first_et"] = df["first_seen_utc"].apply(_to_et)
+    df["__first_et"] = series_to_et_naive(df["first_seen_utc"])
     df["Date (ET)"] = df["__first_et"]
     df = df.sort_values("__first_et", ascending=False, na_position="last")
 
@@ -308,63 +362,27 @@ def generate_excel_bytes() -> bytes:
         else:
             df_out["Notes"] = ""
 
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("SELECT column_name FROM custom_columns")
-    custom_cols = [row[0] for row in cur.fetchall()]
-    con.close()
+    custom_cols = load_custom_columns()
 
     for col in custom_cols:
         if col in df.columns and col not in df_out.columns:
             df_out[col] = df[col]
 
     if "Link" in df_out.columns:
-        df_out["_url"] = df_out["Link"].copy()
-        df_out["Link"] = df_out["_url"].apply(
-            lambda u: f'=HYPERLINK("{str(u).strip()}", "Open")' if pd.notna(u) and str(u).strip() else ""
-        )
+        url = df_out["Link"].fillna("").astype(str).str.strip()
+        has_url = url != ""
+        df_out["Link"] = ""
+        df_out.loc[has_url, "Link"] = '=HYPERLINK("' + url[has_url] + '", "Open")'
 
     desired = [
         "Date (ET)", "Initiated By", "P/N", "Category", "Category_Final",
         "Summary", "Subject", "Notes", "Link",
     ] + custom_cols
     existing = [c for c in desired if c in df_out.columns]
-    if "_url" in df_out.columns:
-        df_out = df_out.drop(columns=["_url"])
     df_out = df_out[existing]
 
     buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        sheet = "Complaints"
-        df_out.to_excel(writer, sheet_name=sheet, index=False)
-        wb = writer.book
-        ws = wb[sheet]
-        ws.freeze_panes = "A2"
-        last_col = get_column_letter(ws.max_column)
-        last_row = ws.max_row
-        tbl = Table(displayName="ComplaintTable", ref=f"A1:{last_col}{last_row}")
-        tbl.tableStyleInfo = TableStyleInfo(
-            name="TableStyleMedium9", showFirstColumn=False, showLastColumn=False,
-            showRowStripes=True, showColumnStripes=False
-        )
-        ws.add_table(tbl)
-        if "Summary" in df_out.columns:
-            cidx = df_out.columns.get_loc("Summary") + 1
-            for r in range(2, ws.max_row + 1):
-                ws.cell(row=r, column=cidx).alignment = Alignment(wrap_text=True, vertical="top")
-        if "Date (ET)" in df_out.columns:
-            didx = df_out.columns.get_loc("Date (ET)") + 1
-            for r in range(2, ws.max_row + 1):
-                ws.cell(row=r, column=didx).number_format = "mm/dd/yyyy"
-        for c in range(1, ws.max_column + 1):
-            ws.cell(row=1, column=c).font = Font(bold=True)
-        target_widths = {
-            "Date (ET)": 12, "Initiated By": 30, "P/N": 26, "Summary": 64,
-            "Category": 18, "Category_Final": 18, "Subject": 44, "Notes": 30, "Link": 10,
-        }
-        for idx, name in enumerate(df_out.columns, start=1):
-            ws.column_dimensions[get_column_letter(idx)].width = target_widths.get(name, 24)
-
+    write_complaints_workbook(df_out, buffer)
     buffer.seek(0)
     return buffer.getvalue()
 
@@ -391,20 +409,30 @@ with st.sidebar:
 
     if st.button("Refresh Data", use_container_width=True, type="primary"):
         st.session_state.db_downloaded = False
+        _rows_for_version.clear()
+        _excel_bytes_for_version.clear()
         st.session_state.df = load_data()
         st.rerun()
 
-    try:
-        excel_data = generate_excel_bytes()
+    # The workbook is only built on request; a prepared one is offered until the
+    # database changes (sync, download, edits), then it has to be prepared again
+    prepared = st.session_state.get("excel_prepared")  # (db version, bytes)
+    if prepared is None or prepared[0] != _db_version():
+        if st.button("Prepare Excel", use_container_width=True):
+            try:
+                st.session_state.excel_prepared = (_db_version(), generate_excel_bytes())
+            except Exception as e:
+                st.error(f"Failed to generate Excel: {e}")
+            else:
+                st.rerun()
+    else:
         st.download_button(
             label="Download Excel",
-            data=excel_data,
+            data=prepared[1],
             file_name=f"Complaint_Log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True
         )
-    except Exception as e:
-        st.error(f"Failed to generate Excel: {e}")
 
     st.caption("Data refreshes from GitHub on load.")
 
@@ -485,17 +513,17 @@ else:
 
     if pn_filter.strip():
         filtered_df = filtered_df[
-            filtered_df["P/N"].astype(str).str.upper().str.contains(pn_filter.strip().upper(), na=False)
+            filtered_df["_pn_key"].str.contains(pn_filter.strip().lower(), na=False, regex=False)
         ]
 
     if initiator_filter.strip():
         filtered_df = filtered_df[
-            filtered_df["Initiated By"].astype(str).str.lower().str.contains(initiator_filter.strip().lower(), na=False)
+            filtered_df["_initiator_key"].str.contains(initiator_filter.strip().lower(), na=False, regex=False)
         ]
 
     if subject_filter.strip():
         filtered_df = filtered_df[
-            filtered_df["Subject"].astype(str).str.lower().str.contains(subject_filter.strip().lower(), na=False)
+            filtered_df["_subject_key"].str.contains(subject_filter.strip().lower(), na=False, regex=False)
         ]
 
     if date_range and len(date_range) == 2: